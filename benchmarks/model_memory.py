@@ -0,0 +1,100 @@
+"""Сравнение памяти и скорости моделей с __slots__ и прежних классов с __dict__.
+
+Запуск из корня проекта: python -m benchmarks.model_memory [количество записей]
+"""
+import sys
+import time
+import tracemalloc
+from model.teacher import Teacher
+from model.classroom import Classroom
+
+
+class DictTeacher:
+    """Прежнее устройство Teacher: атрибуты хранятся в __dict__ экземпляра."""
+
+    def __init__(self, id, full_name, subject, experience, category, phone=""):
+        self.id = id
+        self.full_name = full_name
+        self.subject = subject
+        self.experience = experience
+        self.category = category
+        self.phone = phone
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data["id"],
+            full_name=data["full_name"],
+            subject=data["subject"],
+            experience=data["experience"],
+            category=data["category"],
+            phone=data["phone"]
+        )
+
+
+class DictClassroom:
+    """Прежнее устройство Classroom: атрибуты хранятся в __dict__ экземпляра."""
+
+    def __init__(self, id, class_name, teacher_id, student_count, grade_level):
+        self.id = id
+        self.class_name = class_name
+        self.teacher_id = teacher_id
+        self.student_count = student_count
+        self.grade_level = grade_level
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data["id"],
+            class_name=data["class_name"],
+            teacher_id=data["teacher_id"],
+            student_count=data["student_count"],
+            grade_level=data["grade_level"]
+        )
+
+
+def teacher_records(count):
+    return [{"id": i, "full_name": f"Иванова Мария Петровна {i}", "subject": "Математика",
+             "experience": i % 50, "category": "Высшая", "phone": f"+7-999-{i:07d}"}
+            for i in range(1, count + 1)]
+
+
+def classroom_records(count):
+    return [{"id": i, "class_name": f"{i % 11 + 1}А-{i}", "teacher_id": i % 500 + 1,
+             "student_count": i % 40 + 1, "grade_level": i % 11 + 1}
+            for i in range(1, count + 1)]
+
+
+def measure(build):
+    """Память (байт), занятая построенными объектами, и время построения"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    objects = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size, elapsed
+
+
+def compare(title, records, legacy_class, model_class):
+    rows = [tuple(record.values()) for record in records]
+    results = [
+        ("__dict__, from_dict", measure(lambda: [legacy_class.from_dict(r) for r in records])),
+        ("__slots__, from_dict", measure(lambda: [model_class.from_dict(r) for r in records])),
+        ("__slots__, from_row", measure(lambda: [model_class.from_row(r) for r in rows])),
+    ]
+    baseline = results[0][1][0]
+    print(f"{title}: {len(records)} записей")
+    for name, (size, elapsed) in results:
+        print(f"  {name:<22} {size / 1024 / 1024:8.1f} МБ ({size / baseline:5.0%})  {elapsed * 1000:8.1f} мс")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    compare("Teacher", teacher_records(count), DictTeacher, Teacher)
+    compare("Classroom", classroom_records(count), DictClassroom, Classroom)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,18 @@ from view.custom_classroom_window import CustomClassroomWindow
 from viewmodel.teacher_viewmodel import TeacherViewModel
 from viewmodel.classroom_viewmodel import ClassroomViewModel
 from service.json_service import JSONService
+from viewmodel.relationship_registry import RelationshipRegistry
+from viewmodel.report_views import ReportViews
+from view.virtual_table import VirtualTable
+from view.search_debouncer import SearchDebouncer
+from model.vocabulary import SUBJECTS, CATEGORIES
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib
 matplotlib.use('TkAgg')
 
 class CustomMainWindow(ctk.CTk):
-    def __init__(self, teacher_vm, classroom_vm):
+    def __init__(self, teacher_vm, classroom_vm, reports: ReportViews = None):
         super().__init__()
         
         ctk.set_appearance_mode("light")
@@ -21,11 +26,19 @@ class CustomMainWindow(ctk.CTk):
         self.teacher_vm = teacher_vm
         self.classroom_vm = classroom_vm
         self.current_section = "teachers"
+        # Наборы данных отчетов поверх сводных показателей моделей
+        self.reports = reports or ReportViews(teacher_vm, classroom_vm)
+        # Какой отчет и каких версий данных сейчас нарисован
+        self._chart_key = None
         
         self.create_sidebar()
         self.create_main_content()
         self.refresh_data()
 
+        # Обновление по наборам изменений моделей, в том числе из окон управления
+        self.teacher_vm.subscribe(self.on_teachers_changed)
+        self.classroom_vm.subscribe(self.on_classrooms_changed)
+
     def create_sidebar(self):
         """Создание боковой панели"""
         self.sidebar = ctk.CTkFrame(self, width=280, corner_radius=0, fg_color="#2c3e50")
@@ -187,7 +200,9 @@ class CustomMainWindow(ctk.CTk):
             height=35
         )
         self.teachers_search_entry.pack(side="left", fill="x", expand=True)
-        self.teachers_search_entry.bind("<KeyRelease>", lambda e: self.refresh_teachers_data())
+        # Поиск запускается после паузы в наборе, перекрытые запросы отменяются
+        self.teachers_search = SearchDebouncer(self, self.refresh_teachers_data)
+        self.teachers_search_entry.bind("<KeyRelease>", self.teachers_search.schedule)
         
         # Таблица учителей
         self.create_teachers_table()
@@ -228,7 +243,8 @@ class CustomMainWindow(ctk.CTk):
             height=35
         )
         self.classrooms_search_entry.pack(side="left", fill="x", expand=True)
-        self.classrooms_search_entry.bind("<KeyRelease>", lambda e: self.refresh_classrooms_data())
+        self.classrooms_search = SearchDebouncer(self, self.refresh_classrooms_data)
+        self.classrooms_search_entry.bind("<KeyRelease>", self.classrooms_search.schedule)
         
         # Таблица классов
         self.create_classrooms_table()
@@ -301,8 +317,9 @@ class CustomMainWindow(ctk.CTk):
             self.teachers_tree.heading(col, text=col)
             self.teachers_tree.column(col, width=column_config[col])
         
-        scrollbar = ttk.Scrollbar(self.teachers_frame, orient="vertical", command=self.teachers_tree.yview)
-        self.teachers_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(self.teachers_frame, orient="vertical")
+        # Виртуальная прокрутка: в Treeview только видимые строки, iid - id записи
+        self.teachers_table = VirtualTable(self.teachers_tree, scrollbar)
         
         self.teachers_tree.pack(fill="both", expand=True, padx=20, pady=10)
         scrollbar.pack(side="right", fill="y", padx=(0, 20), pady=10)
@@ -337,8 +354,8 @@ class CustomMainWindow(ctk.CTk):
             self.classrooms_tree.heading(col, text=col)
             self.classrooms_tree.column(col, width=column_config[col])
         
-        scrollbar = ttk.Scrollbar(self.classrooms_frame, orient="vertical", command=self.classrooms_tree.yview)
-        self.classrooms_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(self.classrooms_frame, orient="vertical")
+        self.classrooms_table = VirtualTable(self.classrooms_tree, scrollbar)
         
         self.classrooms_tree.pack(fill="both", expand=True, padx=20, pady=10)
         scrollbar.pack(side="right", fill="y", padx=(0, 20), pady=10)
@@ -396,12 +413,30 @@ class CustomMainWindow(ctk.CTk):
         elif self.current_section == "classrooms":
             self.refresh_classrooms_data()
 
+    def on_teachers_changed(self, changes):
+        """Изменились учителя: статистика и затронутая таблица"""
+        self.refresh_stats()
+        if self.current_section == "teachers":
+            self.refresh_teachers_data()
+        elif self.current_section == "classrooms" and (changes.removed or "full_name" in changes.changed_fields()):
+            # В таблице классов показаны ФИО классных руководителей
+            self.refresh_classrooms_data()
+
+    def on_classrooms_changed(self, changes):
+        """Изменились классы: статистика и таблица классов"""
+        self.refresh_stats()
+        if self.current_section == "classrooms":
+            self.refresh_classrooms_data()
+
     def refresh_stats(self):
         """Обновление статистики"""
-        total_teachers = len(self.teacher_vm.teachers)
-        total_classrooms = len(self.classroom_vm.classrooms)
-        total_students = sum(classroom.student_count for classroom in self.classroom_vm.classrooms)
-        high_category = sum(1 for teacher in self.teacher_vm.teachers if teacher.category == "Высшая")
+        # Сводные показатели поддерживаются моделями при каждом изменении
+        teacher_stats = self.teacher_vm.aggregates
+        classroom_stats = self.classroom_vm.aggregates
+        total_teachers = teacher_stats.count
+        total_classrooms = classroom_stats.count
+        total_students = classroom_stats.sum("student_count")
+        high_category = teacher_stats.count_of("category_code", CATEGORIES.code_of("Высшая"))
         
         self.stats_cards["total_teachers"].configure(text=str(total_teachers))
         self.stats_cards["total_classrooms"].configure(text=str(total_classrooms))
@@ -410,85 +445,55 @@ class CustomMainWindow(ctk.CTk):
 
     def refresh_teachers_data(self):
         """Обновление данных учителей"""
-        for item in self.teachers_tree.get_children():
-            self.teachers_tree.delete(item)
+        search_term = self.teachers_search_entry.get() if hasattr(self, 'teachers_search_entry') else ""
         
-        search_term = self.teachers_search_entry.get().lower() if hasattr(self, 'teachers_search_entry') else ""
-        
-        for teacher in self.teacher_vm.teachers:
-            if search_term and (search_term not in teacher.full_name.lower() and 
-                              search_term not in teacher.subject.lower()):
-                continue
-            
-            self.teachers_tree.insert("", "end", values=(
-                teacher.id, teacher.full_name, teacher.subject, 
-                f"{teacher.experience} лет", teacher.category, teacher.phone
-            ))
+        # Поиск по индексам модели; записи и значения колонок - только для видимых строк
+        teachers = self.teacher_vm.query().search(search_term, ("full_name", "subject")).all()
+
+        self.teachers_table.set_data(teachers, lambda teacher: (
+            teacher.id, teacher.full_name, teacher.subject, 
+            f"{teacher.experience} лет", teacher.category, teacher.phone
+        ))
 
     def refresh_classrooms_data(self):
         """Обновление данных классов"""
-        for item in self.classrooms_tree.get_children():
-            self.classrooms_tree.delete(item)
-        
-        search_term = self.classrooms_search_entry.get().lower() if hasattr(self, 'classrooms_search_entry') else ""
+        search_term = self.classrooms_search_entry.get() if hasattr(self, 'classrooms_search_entry') else ""
         
-        # Создаем словарь для быстрого доступа к учителям
-        teacher_map = {teacher.id: teacher.full_name for teacher in self.teacher_vm.teachers}
-        
-        for classroom in self.classroom_vm.classrooms:
-            teacher_name = teacher_map.get(classroom.teacher_id, "Неизвестно")
-            
-            if search_term and (search_term not in classroom.class_name.lower() and 
-                              search_term not in teacher_name.lower()):
-                continue
-            
-            self.classrooms_tree.insert("", "end", values=(
-                classroom.id, classroom.class_name, teacher_name, 
-                classroom.student_count, f"{classroom.grade_level} класс"
-            ))
+        classrooms = self.classroom_vm.query().search(search_term).all()
+
+        self.classrooms_table.set_data(classrooms, lambda classroom: (
+            classroom.id, classroom.class_name, classroom.teacher_name, 
+            classroom.student_count, f"{classroom.grade_level} класс"
+        ))
 
     def open_teachers_management(self):
         """Открыть управление учителями"""
         window = CustomTeacherWindow(self, self.teacher_vm)
         self.wait_window(window)
-        self.refresh_data()
 
     def open_classrooms_management(self):
         """Открыть управление классами"""
         window = CustomClassroomWindow(self, self.classroom_vm, self.teacher_vm)
         self.wait_window(window)
-        self.refresh_data()
 
-    def show_teachers_stats(self):
-        """Показать статистику учителей"""
+    def _start_chart(self, key) -> bool:
+        """Очистка области графика; False - этот отчет по тем же данным уже показан"""
+        if key == self._chart_key and self.chart_frame.winfo_children():
+            return False
+        self._chart_key = key
         for widget in self.chart_frame.winfo_children():
             widget.destroy()
+        return True
+
+    def show_teachers_stats(self):
+        """Показать статистику учителей"""
+        aggregates = self.teacher_vm.aggregates
+        if not self._start_chart(("teachers", aggregates.version)):
+            return
         
-        # Анализ данных учителей
-        subjects = {}
-        categories = {}
-        experience_ranges = {"0-5 лет": 0, "6-10 лет": 0, "11-20 лет": 0, "20+ лет": 0}
-        
-        for teacher in self.teacher_vm.teachers:
-            # По предметам
-            if teacher.subject not in subjects:
-                subjects[teacher.subject] = 0
-            subjects[teacher.subject] += 1
-            
-            # По категориям
-            if teacher.category not in categories:
-                categories[teacher.category] = 0
-            categories[teacher.category] += 1
-            
-            # По стажу
-            if teacher.experience <= 5:
-                experience_ranges["0-5 лет"] += 1
-            elif teacher.experience <= 10:
-                experience_ranges["6-10 лет"] += 1
-            elif teacher.experience <= 20:
-                experience_ranges["11-20 лет"] += 1
-            else:
-                experience_ranges["20+ лет"] += 1
+        # Распределения из сводных показателей
+        subjects = {SUBJECTS.decode(code): count for code, count in aggregates.counts("subject_code").items()}
+        experience_ranges = self.reports.experience_ranges()
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
         
@@ -513,20 +518,12 @@ class CustomMainWindow(ctk.CTk):
 
     def show_classrooms_stats(self):
         """Показать статистику классов"""
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        # Анализ данных классов
-        grade_levels = {}
-        student_counts = []
+        if not self._start_chart(("classrooms", self.classroom_vm.aggregates.version)):
+            return
         
-        for classroom in self.classroom_vm.classrooms:
-            # По уровням классов
-            if classroom.grade_level not in grade_levels:
-                grade_levels[classroom.grade_level] = 0
-            grade_levels[classroom.grade_level] += 1
-            
-            student_counts.append(classroom.student_count)
+        # Распределения из сводных показателей
+        grade_levels = self.reports.grade_distribution()
+        student_counts = self.reports.student_counts()
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
         
@@ -540,7 +537,9 @@ class CustomMainWindow(ctk.CTk):
         
         # Гистограмма по количеству учеников
         if student_counts:
-            ax2.hist(student_counts, bins=8, color='lightgreen', edgecolor='black')
+            counts = sorted(student_counts)
+            ax2.hist(counts, weights=[student_counts[count] for count in counts], bins=8,
+                     color='lightgreen', edgecolor='black')
             ax2.set_title('Распределение классов по количеству учеников')
             ax2.set_xlabel('Количество учеников')
             ax2.set_ylabel('Количество классов')
@@ -554,19 +553,14 @@ class CustomMainWindow(ctk.CTk):
 
     def show_subjects_stats(self):
         """Показать распределение по предметам"""
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        # Анализ нагрузки учителей по предметам
-        subject_load = {}
+        if not self._start_chart(("subjects", self.teacher_vm.aggregates.version,
+                                  self.classroom_vm.aggregates.version)):
+            return
         
-        for teacher in self.teacher_vm.teachers:
-            if teacher.subject not in subject_load:
-                subject_load[teacher.subject] = 0
-            # Подсчитываем количество классов, которые ведет учитель
-            classes_taught = sum(1 for classroom in self.classroom_vm.classrooms 
-                               if classroom.teacher_id == teacher.id)
-            subject_load[teacher.subject] += classes_taught
+        # Нагрузка по предметам: классы по предмету руководителя, предметы без классов - с нулем
+        load_by_code = self.reports.subject_load()
+        subject_load = {SUBJECTS.decode(code): load_by_code.get(code, 0)
+                        for code in self.teacher_vm.aggregates.counts("subject_code")}
         
         fig, ax = plt.subplots(figsize=(10, 6))
         
@@ -592,12 +586,17 @@ class CustomMainWindow(ctk.CTk):
         canvas.get_tk_widget().pack(fill="both", expand=True)
 
 def main():
-    json_service = JSONService()
-    teacher_vm = TeacherViewModel(json_service)
-    classroom_vm = ClassroomViewModel(teacher_vm, json_service)
+    json_service = JSONService(journal=True, flush_interval=0.5, startup_cache=True)
+    relations = RelationshipRegistry(on_teacher_delete=RelationshipRegistry.RESTRICT)
+    teacher_vm = TeacherViewModel(json_service, relations)
+    classroom_vm = ClassroomViewModel(teacher_vm, json_service, relations)
 
     app = CustomMainWindow(teacher_vm, classroom_vm)
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        # Отложенные изменения не должны теряться при выходе
+        json_service.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
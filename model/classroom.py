@@ -1,13 +1,52 @@
 class Classroom:
     """Класс, представляющий учебный класс."""
 
+    # Без __dict__ у каждого экземпляра: заметная экономия памяти на больших списках.
+    # _teacher_name - ФИО руководителя, которое заполняет модель представления (не сохраняется);
+    # _search_keys - кэш ключей поиска, сбрасывается при изменении названия и ФИО.
+    __slots__ = ("id", "_class_name", "teacher_id", "student_count", "grade_level", "_teacher_name", "_search_keys")
+
+    # Порядок полей для to_row/from_row
+    FIELDS = ("id", "class_name", "teacher_id", "student_count", "grade_level")
+
     def __init__(self, id: int, class_name: str, teacher_id: int, student_count: int, grade_level: int):
         self.id = id
+        self._teacher_name = ""
         self.class_name = class_name
         self.teacher_id = teacher_id
         self.student_count = student_count
         self.grade_level = grade_level
 
+    @property
+    def class_name(self) -> str:
+        return self._class_name
+
+    @class_name.setter
+    def class_name(self, value: str):
+        self._class_name = value
+        self._search_keys = None
+
+    @property
+    def teacher_name(self) -> str:
+        return self._teacher_name
+
+    @teacher_name.setter
+    def teacher_name(self, value: str):
+        self._teacher_name = value
+        self._search_keys = None
+
+    @property
+    def search_keys(self) -> tuple:
+        """Название и ФИО руководителя в casefold; вычисляются при первом обращении после изменения"""
+        if self._search_keys is None:
+            self._search_keys = (self._class_name.casefold(), self._teacher_name.casefold())
+        return self._search_keys
+
+    @property
+    def name_key(self) -> str:
+        """Название без учета регистра для проверки уникальности"""
+        return self.search_keys[0]
+
     def to_dict(self):
         """Преобразование объекта в словарь для JSON"""
         return {
@@ -18,16 +57,24 @@ class Classroom:
             "grade_level": self.grade_level
         }
 
+    def to_row(self) -> tuple:
+        """Преобразование объекта в кортеж полей в порядке FIELDS"""
+        return (self.id, self.class_name, self.teacher_id, self.student_count, self.grade_level)
+
     @classmethod
     def from_dict(cls, data: dict):
         """Создание объекта из словаря"""
-        return cls(
-            id=data["id"],
-            class_name=data["class_name"],
-            teacher_id=data["teacher_id"],
-            student_count=data["student_count"],
-            grade_level=data["grade_level"]
-        )
+        return cls(data["id"], data["class_name"], data["teacher_id"],
+                   data["student_count"], data["grade_level"])
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        """Создание объекта из кортежа полей в порядке FIELDS"""
+        return cls(*row)
+
+    def __reduce__(self):
+        # ФИО руководителя и ключи поиска не сохраняются: их восстанавливает модель представления
+        return (self.__class__, self.to_row())
 
     def __repr__(self):
         return f"Classroom(id={self.id}, class_name='{self.class_name}', teacher_id={self.teacher_id}, students={self.student_count}, grade={self.grade_level})"
\ No newline at end of file
@@ -0,0 +1,89 @@
+from array import array
+from collections import Counter
+from typing import Dict, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ClassroomColumns:
+    """Колоночное хранилище классов: параллельные массивы id, teacher_id, student_count, grade_level."""
+
+    def __init__(self, classrooms: Iterable = ()):
+        self.ids = array("q")
+        self.teacher_ids = array("q")
+        self.student_counts = array("q")
+        self.grade_levels = array("q")
+        # id класса -> номер строки в массивах
+        self._rows: Dict[int, int] = {}
+        for classroom in classrooms:
+            self.add(classroom)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, classroom):
+        self._rows[classroom.id] = len(self.ids)
+        self.ids.append(classroom.id)
+        self.teacher_ids.append(classroom.teacher_id)
+        self.student_counts.append(classroom.student_count)
+        self.grade_levels.append(classroom.grade_level)
+
+    def update(self, classroom):
+        row = self._rows[classroom.id]
+        self.teacher_ids[row] = classroom.teacher_id
+        self.student_counts[row] = classroom.student_count
+        self.grade_levels[row] = classroom.grade_level
+
+    def remove(self, classroom_id: int):
+        """Удаление за O(1): на место строки переносится последняя"""
+        row = self._rows.pop(classroom_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            for column in (self.ids, self.teacher_ids, self.student_counts, self.grade_levels):
+                column[row] = column[last]
+            self._rows[self.ids[row]] = row
+        for column in (self.ids, self.teacher_ids, self.student_counts, self.grade_levels):
+            column.pop()
+
+    def total_students(self) -> int:
+        if np is not None and self.ids:
+            return int(np.frombuffer(self.student_counts, dtype=np.int64).sum())
+        return sum(self.student_counts)
+
+    def average_students(self) -> float:
+        return self.total_students() / len(self.ids) if self.ids else 0
+
+    def grade_histogram(self) -> Dict[int, int]:
+        """Количество классов по уровням"""
+        return self.count_by(self.grade_levels)
+
+    def students_by_grade(self) -> Dict[int, int]:
+        """Количество учеников по уровням"""
+        return self.sum_by(self.grade_levels, self.student_counts)
+
+    def classes_by_teacher(self) -> Dict[int, int]:
+        """Количество классов у каждого классного руководителя"""
+        return self.count_by(self.teacher_ids)
+
+    def count_by(self, keys: array) -> Dict[int, int]:
+        """Группировка с подсчетом по колонке"""
+        if np is not None and keys:
+            values, counts = np.unique(np.frombuffer(keys, dtype=np.int64), return_counts=True)
+            return dict(zip(values.tolist(), counts.tolist()))
+        return dict(Counter(keys))
+
+    def sum_by(self, keys: array, values: array) -> Dict[int, int]:
+        """Группировка с суммой значений одной колонки по другой"""
+        if np is not None and keys:
+            groups, inverse = np.unique(np.frombuffer(keys, dtype=np.int64), return_inverse=True)
+            sums = np.bincount(inverse, weights=np.frombuffer(values, dtype=np.int64))
+            return dict(zip(groups.tolist(), sums.astype(np.int64).tolist()))
+        sums: Dict[int, int] = {}
+        for key, value in zip(keys, values):
+            sums[key] = sums.get(key, 0) + value
+        return sums
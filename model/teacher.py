@@ -1,6 +1,16 @@
+from model.vocabulary import SUBJECTS, CATEGORIES
+
 class Teacher:
     """Класс, представляющий учителя."""
 
+    # Без __dict__ у каждого экземпляра: заметная экономия памяти на больших списках.
+    # Предмет и категория хранятся кодами общих словарей SUBJECTS и CATEGORIES.
+    # _search_keys - кэш ключей поиска, сбрасывается при изменении ФИО, предмета и телефона.
+    __slots__ = ("id", "_full_name", "subject_code", "experience", "category_code", "_phone", "_search_keys")
+
+    # Порядок полей для to_row/from_row
+    FIELDS = ("id", "full_name", "subject", "experience", "category", "phone")
+
     def __init__(self, id: int, full_name: str, subject: str, experience: int, category: str, phone: str = ""):
         self.id = id
         self.full_name = full_name
@@ -9,6 +19,53 @@ class Teacher:
         self.category = category
         self.phone = phone
 
+    @property
+    def full_name(self) -> str:
+        return self._full_name
+
+    @full_name.setter
+    def full_name(self, value: str):
+        self._full_name = value
+        self._search_keys = None
+
+    @property
+    def subject(self) -> str:
+        return SUBJECTS.decode(self.subject_code)
+
+    @subject.setter
+    def subject(self, value: str):
+        self.subject_code = SUBJECTS.encode(value)
+        self._search_keys = None
+
+    @property
+    def category(self) -> str:
+        return CATEGORIES.decode(self.category_code)
+
+    @category.setter
+    def category(self, value: str):
+        self.category_code = CATEGORIES.encode(value)
+
+    @property
+    def phone(self) -> str:
+        return self._phone
+
+    @phone.setter
+    def phone(self, value: str):
+        self._phone = value
+        self._search_keys = None
+
+    @property
+    def search_keys(self) -> tuple:
+        """ФИО, предмет и телефон в casefold; вычисляются при первом обращении после изменения"""
+        if self._search_keys is None:
+            self._search_keys = (self._full_name.casefold(), self.subject.casefold(), self._phone.casefold())
+        return self._search_keys
+
+    @property
+    def name_key(self) -> str:
+        """ФИО без учета регистра для проверки уникальности"""
+        return self.search_keys[0]
+
     def to_dict(self):
         """Преобразование объекта в словарь для JSON"""
         return {
@@ -20,17 +77,24 @@ class Teacher:
             "phone": self.phone
         }
 
+    def to_row(self) -> tuple:
+        """Преобразование объекта в кортеж полей в порядке FIELDS"""
+        return (self.id, self.full_name, self.subject, self.experience, self.category, self.phone)
+
     @classmethod
     def from_dict(cls, data: dict):
         """Создание объекта из словаря"""
-        return cls(
-            id=data["id"],
-            full_name=data["full_name"],
-            subject=data["subject"],
-            experience=data["experience"],
-            category=data["category"],
-            phone=data["phone"]
-        )
+        return cls(data["id"], data["full_name"], data["subject"],
+                   data["experience"], data["category"], data["phone"])
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        """Создание объекта из кортежа полей в порядке FIELDS"""
+        return cls(*row)
+
+    def __reduce__(self):
+        # Коды зависят от порядка заполнения словарей, поэтому сохраняются строки
+        return (self.__class__, self.to_row())
 
     def __repr__(self):
         return f"Teacher(id={self.id}, full_name='{self.full_name}', subject='{self.subject}', experience={self.experience}, category='{self.category}', phone='{self.phone}')"
\ No newline at end of file
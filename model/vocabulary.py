@@ -0,0 +1,42 @@
+import sys
+from typing import Dict, List, Optional, Iterable
+
+
+class Vocabulary:
+    """Словарь значений категориального поля: строка <-> небольшой целый код."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def encode(self, value: str) -> int:
+        """Код значения; новое значение добавляется в конец словаря"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            value = sys.intern(value)
+            self._values.append(value)
+            self._codes[value] = code
+        return code
+
+    def code_of(self, value: str) -> Optional[int]:
+        """Код значения без добавления в словарь (None, если значения нет)"""
+        return self._codes.get(value)
+
+    def decode(self, code: int) -> str:
+        return self._values[code]
+
+    def values(self) -> List[str]:
+        return list(self._values)
+
+
+# Общие словари для полей учителя; начальный порядок совпадает со списками в формах
+SUBJECTS = Vocabulary(["Математика", "Физика", "Химия", "Биология", "История",
+                       "Литература", "Русский язык", "Иностранный язык",
+                       "География", "Информатика", "Физкультура", "Музыка", "ИЗО"])
+CATEGORIES = Vocabulary(["Высшая", "Первая", "Вторая", "Без категории"])
@@ -0,0 +1,220 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import List, TypeVar, Type, Iterator, BinaryIO, Optional
+
+T = TypeVar('T')
+
+# Формат снимка (little-endian):
+#   заголовок: сигнатура, версия, резерв, число строк, число колонок;
+#   описания колонок: длина имени, тип, смещение блока, имя;
+#   блоки колонок, выровненные на 8 байт:
+#     'i' - массив int64 на каждую строку,
+#     's' - массив uint64 из (строк + 1) смещений и куча UTF-8 байтов,
+#     'd' - словарное кодирование (с версии 2): uint64 размер словаря k,
+#           словарь в виде блока 's' из k строк и массив uint16 кодов на каждую строку.
+MAGIC = b"SCOL"
+VERSION = 2
+_SUPPORTED_VERSIONS = (1, 2)
+_HEADER = struct.Struct("<4sHHQI")
+_COLUMN = struct.Struct("<H1sQ")
+_NATIVE_LITTLE = sys.byteorder == "little"
+
+
+def _pad(size: int) -> int:
+    return (8 - size % 8) % 8
+
+
+def _to_bytes(values: array) -> bytes:
+    if not _NATIVE_LITTLE:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _string_block(values: List[str]) -> bytes:
+    """Массив смещений и куча UTF-8 байтов"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("Q", [0])
+    total = 0
+    for value in encoded:
+        total += len(value)
+        offsets.append(total)
+    heap = b"".join(encoded)
+    return _to_bytes(offsets) + heap + b"\0" * _pad(len(heap))
+
+
+def write_snapshot(f: BinaryIO, records: List[dict]):
+    """Запись словарей одной модели в колоночный формат"""
+    columns = []
+    blocks = []
+    for name, value in (records[0].items() if records else ()):
+        if isinstance(value, int) and not isinstance(value, bool):
+            columns.append((name, b"i"))
+            blocks.append(_to_bytes(array("q", (record[name] for record in records))))
+            continue
+
+        values = [str(record[name]) for record in records]
+        dictionary = {}
+        for value in values:
+            dictionary.setdefault(value, len(dictionary))
+        # Поля с малым числом различных значений (предмет, категория) хранятся кодами
+        if len(dictionary) <= 0xFFFF and len(dictionary) * 2 <= len(values):
+            columns.append((name, b"d"))
+            codes = array("H", (dictionary[value] for value in values))
+            blocks.append(struct.pack("<Q", len(dictionary)) + _string_block(list(dictionary))
+                          + _to_bytes(codes))
+        else:
+            columns.append((name, b"s"))
+            blocks.append(_string_block(values))
+
+    header_size = _HEADER.size + sum(_COLUMN.size + len(name.encode("utf-8")) for name, _ in columns)
+    offset = header_size + _pad(header_size)
+
+    header = bytearray(_HEADER.pack(MAGIC, VERSION, 0, len(records), len(columns)))
+    for (name, kind), block in zip(columns, blocks):
+        encoded_name = name.encode("utf-8")
+        header += _COLUMN.pack(len(encoded_name), kind, offset) + encoded_name
+        offset += len(block) + _pad(len(block))
+    header += b"\0" * _pad(len(header))
+
+    f.write(header)
+    for block in blocks:
+        f.write(block)
+        f.write(b"\0" * _pad(len(block)))
+
+
+class BinarySnapshot:
+    """Колоночный снимок, отображаемый в память; объекты создаются при обращении к строке."""
+
+    def __init__(self, path, model_class: Optional[Type[T]] = None):
+        self.model_class = model_class
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, _, self._rows, column_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version not in _SUPPORTED_VERSIONS:
+            self.close()
+            raise ValueError(f"Неизвестный формат снимка: {path}")
+
+        self._columns = {}
+        pos = _HEADER.size
+        for _ in range(column_count):
+            name_length, kind, offset = _COLUMN.unpack_from(self._mmap, pos)
+            pos += _COLUMN.size
+            name = bytes(self._view[pos:pos + name_length]).decode("utf-8")
+            pos += name_length
+            self._columns[name] = (kind, offset)
+
+        self._arrays = {}
+        self._dictionaries = {}
+        self._materialized = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Освобождение отображения файла"""
+        for view in self._arrays.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self._arrays = {}
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Снаружи еще удерживаются представления колонок
+            pass
+        self._file.close()
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def column(self, name: str):
+        """Числовая колонка без копирования (memoryview int64)"""
+        kind, offset = self._columns[name]
+        if kind != b"i":
+            raise ValueError(f"Колонка {name} не является числовой.")
+        return self._array(name, offset, self._rows, "q")
+
+    def codes(self, name: str):
+        """Коды словарной колонки без копирования (memoryview uint16)"""
+        kind, offset = self._columns[name]
+        if kind != b"d":
+            raise ValueError(f"Колонка {name} не закодирована словарем.")
+        size = struct.unpack_from("<Q", self._mmap, offset)[0]
+        offsets = self._array((name, "offsets"), offset + 8, size + 1, "Q")
+        codes_offset = offset + 8 + 8 * (size + 1) + offsets[size] + _pad(offsets[size])
+        return self._array((name, "codes"), codes_offset, self._rows, "H")
+
+    def dictionary(self, name: str) -> List[str]:
+        """Словарь значений словарной колонки"""
+        if name not in self._dictionaries:
+            kind, offset = self._columns[name]
+            if kind != b"d":
+                raise ValueError(f"Колонка {name} не закодирована словарем.")
+            size = struct.unpack_from("<Q", self._mmap, offset)[0]
+            self._dictionaries[name] = [self._string(name, offset + 8, size, index)
+                                        for index in range(size)]
+        return self._dictionaries[name]
+
+    def _string(self, name: str, offset: int, count: int, index: int) -> str:
+        """Строка номер index из блока строк с count элементами"""
+        offsets = self._array((name, "offsets"), offset, count + 1, "Q")
+        heap = offset + 8 * (count + 1)
+        return bytes(self._view[heap + offsets[index]:heap + offsets[index + 1]]).decode("utf-8")
+
+    def _array(self, key, offset: int, length: int, typecode: str):
+        if key not in self._arrays:
+            view = self._view[offset:offset + array(typecode).itemsize * length]
+            if _NATIVE_LITTLE:
+                self._arrays[key] = view.cast(typecode)
+            else:
+                values = array(typecode, view.tobytes())
+                values.byteswap()
+                self._arrays[key] = values
+        return self._arrays[key]
+
+    def value(self, index: int, name: str):
+        """Значение одного поля строки"""
+        kind, offset = self._columns[name]
+        if kind == b"i":
+            return self.column(name)[index]
+        if kind == b"d":
+            return self.dictionary(name)[self.codes(name)[index]]
+        return self._string(name, offset, self._rows, index)
+
+    def row(self, index: int) -> dict:
+        """Строка в виде словаря"""
+        return {name: self.value(index, name) for name in self._columns}
+
+    def iter_rows(self) -> Iterator[dict]:
+        for index in range(self._rows):
+            yield self.row(index)
+
+    def __getitem__(self, index: int) -> T:
+        """Объект модели, создаваемый при первом обращении к строке"""
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("Индекс строки вне диапазона.")
+        if index not in self._materialized:
+            if getattr(self.model_class, "FIELDS", None) == tuple(self._columns):
+                # Колонки идут в порядке полей модели: объект собирается без словаря
+                row = tuple(self.value(index, name) for name in self._columns)
+                self._materialized[index] = self.model_class.from_row(row)
+            else:
+                self._materialized[index] = self.model_class.from_dict(self.row(index))
+        return self._materialized[index]
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(self._rows):
+            yield self[index]
@@ -0,0 +1,30 @@
+class IdSequence:
+    """Монотонная последовательность ID сущности, сохраняемая вместе с данными.
+
+    ID выдаются за O(1) и никогда не используются повторно, даже после удаления записи.
+    """
+
+    def __init__(self, storage, name: str, floor: int = 0):
+        self.storage = storage
+        self.name = name
+        # floor - наибольший ID в загруженных данных: защищает от отставшего счетчика
+        self._last = max(storage.load_sequence(name), floor)
+
+    @property
+    def last(self) -> int:
+        return self._last
+
+    def next_id(self) -> int:
+        """Следующий ID; счетчик сохраняется до того, как ID будет использован"""
+        self._last += 1
+        self.storage.save_sequence(self.name, self._last)
+        return self._last
+
+    def reserve(self, count: int) -> range:
+        """Резервирование блока из count ID для массовой загрузки"""
+        if count < 0:
+            raise ValueError("Количество резервируемых ID не может быть отрицательным.")
+        start = self._last + 1
+        self._last += count
+        self.storage.save_sequence(self.name, self._last)
+        return range(start, self._last + 1)
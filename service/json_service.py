@@ -1,42 +1,436 @@
 import json
 import os
-from typing import List, TypeVar, Type
+import tempfile
+import threading
+from typing import List, TypeVar, Type, Iterable, Iterator, Callable
 from pathlib import Path
+from service.binary_snapshot import BinarySnapshot, write_snapshot
+from service.load_cache import LoadCache
 
 T = TypeVar('T')
 
 class JSONService:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", journal: bool = False,
+                 compact_threshold: int = 256 * 1024, flush_interval: float = 0.0,
+                 snapshot_format: str = "json", startup_cache: bool = False):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        # Режим журнала: изменения дописываются в <имя>.journal рядом со снимком
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        # Окно (в секундах), за которое записи в один файл сливаются в одну
+        self.flush_interval = flush_interval
+        # Формат снимков: "json", "binary" (колоночный <имя>.bin) или "both"
+        if snapshot_format not in ("json", "binary", "both"):
+            raise ValueError(f"Неизвестный формат снимка: {snapshot_format}")
+        self.snapshot_format = snapshot_format
+        # Кэш готовых списков моделей для быстрых повторных запусков
+        self.cache = LoadCache(self.data_dir / ".cache") if startup_cache else None
+        self._lock = threading.RLock()
+        self._generations = {}
+        self._compactions = {}
+        self._pending_snapshots = {}
+        self._pending_lines = {}
+        self._pending_sequences = {}
+        self._sequences = None
+        self._flush_timer = None
 
     def load_data(self, filename: str, model_class: Type[T]) -> List[T]:
         """Загрузка данных из JSON файла"""
         file_path = self.data_dir / filename
+        # Отложенные записи должны попасть на диск до чтения
+        self.flush()
 
-        # Если файл не существует, создаем пустой список
-        if not file_path.exists():
+        # Если нет ни снимка, ни журнала, создаем пустой список
+        sources = [file_path, self._binary_path(file_path)] + self._journal_paths(filename)
+        if not any(path.exists() for path in sources):
             self.save_data(filename, [])
             return []
 
+        sources = [path for path in sources if path.exists()]
+        if self.cache:
+            cached = self.cache.get(filename, model_class, sources)
+            if cached is not None:
+                return cached
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [model_class.from_dict(item) for item in data]
+            # Файл разбирается потоково, без промежуточного списка словарей
+            items = list(self.iter_data(filename, model_class))
+            if self.cache:
+                self.cache.put(filename, model_class, sources, items)
+            return items
         except (json.JSONDecodeError, KeyError) as e:
             print(f"Ошибка загрузки данных из {filename}: {e}")
             return []
 
+    def load_records(self, filename: str) -> List[dict]:
+        """Загрузка записей в виде словарей с учетом журнала"""
+        return list(self.iter_records(filename))
+
+    def iter_records(self, filename: str, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+        """Потоковое чтение записей по одной с учетом журнала"""
+        self.flush()
+        items = self._iter_snapshot(self.data_dir / filename, chunk_size)
+        # Журнал проигрывается всегда, даже если режим журнала выключен,
+        # иначе при смене режима потерялись бы последние изменения
+        return self._replay(items, self._journal_paths(filename))
+
+    def iter_data(self, filename: str, model_class: Type[T]) -> Iterator[T]:
+        """Генератор объектов модели: в памяти только текущий элемент и блок чтения"""
+        for item in self.iter_records(filename):
+            yield model_class.from_dict(item)
+
+    def iter_batches(self, filename: str, model_class: Type[T], batch_size: int = 1000) -> Iterator[List[T]]:
+        """Чтение пачками ограниченного размера для отчетов и выгрузок"""
+        batch = []
+        for item in self.iter_data(filename, model_class):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def save_data(self, filename: str, data: List[T]):
         """Сохранение данных в JSON файл"""
+        # Словари снимаются сразу: запись по таймеру идет в другом потоке,
+        # пока модели продолжают менять свои объекты
+        data_dicts = [item.to_dict() for item in data]
+        if self.flush_interval > 0:
+            with self._lock:
+                self._pending_snapshots[filename] = data_dicts
+                # Полный снимок перекрывает накопленные записи журнала
+                self._pending_lines.pop(filename, None)
+                self._schedule_flush()
+            return
+        self._save_snapshot(filename, data_dicts)
+
+    def _save_snapshot(self, filename: str, data_dicts: List[dict]):
+        """Немедленная запись полного снимка из словарей записей"""
         file_path = self.data_dir / filename
 
         try:
-            # Преобразуем объекты в словари
-            data_dicts = [item.to_dict() for item in data]
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_dicts, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                self._write_snapshot(file_path, data_dicts)
+                # Полный снимок уже содержит все изменения из журнала
+                for path in self._journal_paths(filename):
+                    if path.exists():
+                        path.unlink()
+                self._generations[filename] = self._generations.get(filename, 0) + 1
         except Exception as e:
             print(f"Ошибка сохранения данных в {filename}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def save_changes(self, filename: str, data: List[T], upserted: Iterable[T] = (),
+                     deleted: Iterable[int] = ()):
+        """Сохранение изменений: запись в журнал или полная перезапись файла"""
+        if not self.journal:
+            self.save_data(filename, data)
+            return
+
+        lines = [json.dumps({"op": "put", "data": item.to_dict()}, ensure_ascii=False)
+                 for item in upserted]
+        lines += [json.dumps({"op": "delete", "id": item_id}) for item_id in deleted]
+        if not lines:
+            return
+
+        if self.flush_interval > 0:
+            with self._lock:
+                if filename in self._pending_snapshots:
+                    self._pending_snapshots[filename] = [item.to_dict() for item in data]
+                else:
+                    self._pending_lines.setdefault(filename, []).extend(lines)
+                self._schedule_flush()
+            return
+        self._append_journal(filename, lines)
+
+    def open_snapshot(self, filename: str, model_class: Type[T]) -> BinarySnapshot:
+        """Открытие бинарного снимка для ленивого чтения отдельных строк"""
+        self.flush()
+        thread = self._compactions.get(filename)
+        if thread:
+            thread.join()
+        # Журнал сворачивается, чтобы снимок содержал все изменения
+        self.compact(filename)
+
+        file_path = self.data_dir / filename
+        binary_path = self._binary_path(file_path)
+        with self._lock:
+            if not self._binary_is_current(file_path):
+                records = list(self._iter_snapshot(file_path))
+                self._write_atomic(binary_path, lambda f: write_snapshot(f, records), binary=True)
+        return BinarySnapshot(binary_path, model_class)
+
+    def load_sequence(self, name: str) -> int:
+        """Последний выданный ID последовательности (0, если ее еще нет)"""
+        with self._lock:
+            if name in self._pending_sequences:
+                return self._pending_sequences[name]
+            return self._read_sequences().get(name, 0)
+
+    def save_sequence(self, name: str, value: int):
+        """Сохранение последнего выданного ID последовательности"""
+        if self.flush_interval > 0:
+            with self._lock:
+                self._pending_sequences[name] = value
+                self._schedule_flush()
+            return
+        self._write_sequences({name: value})
+
+    def _read_sequences(self) -> dict:
+        if self._sequences is None:
+            path = self.data_dir / "sequences.json"
+            self._sequences = {}
+            if path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self._sequences = json.load(f)
+                except json.JSONDecodeError as e:
+                    print(f"Ошибка загрузки данных из {path.name}: {e}")
+        return self._sequences
+
+    def _write_sequences(self, values: dict):
+        with self._lock:
+            sequences = self._read_sequences()
+            sequences.update(values)
+            self._write_atomic(self.data_dir / "sequences.json",
+                               lambda f: json.dump(sequences, f, ensure_ascii=False, indent=2))
+
+    def flush(self):
+        """Немедленная запись всех отложенных изменений"""
+        with self._lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            snapshots, self._pending_snapshots = self._pending_snapshots, {}
+            pending_lines, self._pending_lines = self._pending_lines, {}
+            sequences, self._pending_sequences = self._pending_sequences, {}
+            # Счетчики пишутся первыми: после сбоя возможен пропуск ID, но не повтор
+            if sequences:
+                self._write_sequences(sequences)
+            for filename, data_dicts in snapshots.items():
+                self._save_snapshot(filename, data_dicts)
+            for filename, lines in pending_lines.items():
+                self._append_journal(filename, lines)
+
+    def close(self):
+        """Запись отложенных изменений и ожидание фоновой свертки"""
+        self.flush()
+        for thread in list(self._compactions.values()):
+            thread.join()
+
+    def _schedule_flush(self):
+        """Планирование записи по окончании окна"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self._flush_in_background)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Ошибка отложенного сохранения данных: {e}")
+
+    def _append_journal(self, filename: str, lines: List[str]):
+        """Дописывание записей в журнал"""
+        journal_path = self._journal_paths(filename)[1]
+        try:
+            with self._lock:
+                with open(journal_path, 'ab') as f:
+                    # Оборванная при сбое строка не должна склеиться с новой записью
+                    prefix = ""
+                    if f.tell() > 0:
+                        with open(journal_path, 'rb') as tail:
+                            tail.seek(-1, os.SEEK_END)
+                            if tail.read(1) != b"\n":
+                                prefix = "\n"
+                    f.write((prefix + "\n".join(lines) + "\n").encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                size = journal_path.stat().st_size
+        except Exception as e:
+            print(f"Ошибка записи журнала {journal_path.name}: {e}")
+            raise
+
+        if size >= self.compact_threshold:
+            self._start_compaction(filename)
+
+    def compact(self, filename: str):
+        """Свертка журнала в новый снимок"""
+        file_path = self.data_dir / filename
+        compacting_path, journal_path = self._journal_paths(filename)
+
+        with self._lock:
+            # Незавершенная свертка (например, после сбоя) сворачивается первой
+            if not compacting_path.exists():
+                if not journal_path.exists():
+                    return
+                os.replace(journal_path, compacting_path)
+            generation = self._generations.get(filename, 0)
+
+        try:
+            items = list(self._replay(self._iter_snapshot(file_path), [compacting_path]))
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"Ошибка свертки журнала {filename}: {e}")
+            return
+
+        with self._lock:
+            # Если за время свертки файл был полностью перезаписан, результат устарел
+            if self._generations.get(filename, 0) != generation:
+                return
+            self._write_snapshot(file_path, items)
+            if compacting_path.exists():
+                compacting_path.unlink()
+
+    def _start_compaction(self, filename: str):
+        """Запуск свертки журнала в фоновом потоке"""
+        with self._lock:
+            thread = self._compactions.get(filename)
+            if thread and thread.is_alive():
+                return
+            thread = threading.Thread(target=self.compact, args=(filename,), daemon=True)
+            self._compactions[filename] = thread
+            thread.start()
+
+    def _journal_paths(self, filename: str) -> List[Path]:
+        """Файлы журнала в порядке проигрывания: сворачиваемый и текущий"""
+        journal_path = (self.data_dir / filename).with_suffix(".journal")
+        return [journal_path.with_name(journal_path.name + ".compacting"), journal_path]
+
+    def _binary_path(self, file_path: Path) -> Path:
+        return file_path.with_suffix(".bin")
+
+    def _binary_is_current(self, file_path: Path) -> bool:
+        """Бинарный снимок есть и не старше JSON"""
+        binary_path = self._binary_path(file_path)
+        if not binary_path.exists():
+            return False
+        return not file_path.exists() or binary_path.stat().st_mtime_ns >= file_path.stat().st_mtime_ns
+
+    def _iter_snapshot(self, file_path: Path, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+        """Чтение снимка: бинарного, если он актуален, иначе JSON"""
+        if self.snapshot_format != "json" and self._binary_is_current(file_path):
+            with BinarySnapshot(self._binary_path(file_path)) as snapshot:
+                yield from snapshot.iter_rows()
+            return
+        yield from self._iter_json(file_path, chunk_size)
+
+    def _iter_json(self, file_path: Path, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+        """Потоковый разбор JSON массива верхнего уровня по элементам"""
+        if not file_path.exists():
+            return
+        decoder = json.JSONDecoder()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            buffer = ""
+            pos = 0
+            started = False
+            while True:
+                while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                    pos += 1
+                if pos == len(buffer):
+                    buffer = f.read(chunk_size)
+                    pos = 0
+                    if not buffer:
+                        raise json.JSONDecodeError("Неожиданный конец файла", "", 0)
+                    continue
+
+                if not started:
+                    if buffer[pos] != "[":
+                        raise json.JSONDecodeError("Ожидался массив", buffer, pos)
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Элемент не поместился в прочитанный блок
+                    more = f.read(chunk_size)
+                    if not more:
+                        raise
+                    buffer, pos = buffer[pos:] + more, 0
+                    continue
+                if end == len(buffer):
+                    # Значение могло оборваться ровно на границе блока
+                    more = f.read(chunk_size)
+                    if more:
+                        buffer, pos = buffer[pos:] + more, 0
+                        continue
+                yield item
+                pos = end
+                # Разобранная часть буфера отбрасывается
+                if pos >= chunk_size:
+                    buffer, pos = buffer[pos:], 0
+
+    def _write_snapshot(self, file_path: Path, data_dicts: List[dict]):
+        """Запись снимка в выбранных форматах"""
+        if self.snapshot_format in ("json", "both"):
+            self._write_atomic(file_path, lambda f: json.dump(data_dicts, f, ensure_ascii=False, indent=2))
+        if self.snapshot_format in ("binary", "both"):
+            self._write_atomic(self._binary_path(file_path), lambda f: write_snapshot(f, data_dicts),
+                               binary=True)
+
+    def _write_atomic(self, file_path: Path, write: Callable, binary: bool = False):
+        """Атомарная запись файла: временный файл, fsync и переименование"""
+        fd, tmp_name = tempfile.mkstemp(prefix=file_path.name + ".", suffix=".tmp",
+                                        dir=file_path.parent)
+        try:
+            with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, file_path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        self._fsync_dir(file_path.parent)
+
+    def _fsync_dir(self, dir_path: Path):
+        """Сброс на диск записи каталога после переименования"""
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+        except OSError:
+            # На Windows каталог нельзя открыть для fsync
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _replay(self, items: Iterable[dict], journal_paths: List[Path]) -> Iterator[dict]:
+        """Применение записей журнала поверх потока записей снимка"""
+        # В памяти держится только журнал, размер которого ограничен сверткой
+        changed = {}
+        removed = set()
+        for path in journal_paths:
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Оборванная при сбое запись в конце журнала
+                        continue
+                    if entry["op"] == "put":
+                        changed[entry["data"]["id"]] = entry["data"]
+                    elif entry["op"] == "delete":
+                        changed.pop(entry["id"], None)
+                        removed.add(entry["id"])
+
+        for item in items:
+            # Удаленные записи (в том числе добавленные заново) пропускаются:
+            # повторно добавленные окажутся в конце, как при обычной вставке
+            if item["id"] in removed:
+                continue
+            yield changed.pop(item["id"], item)
+        yield from changed.values()
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import List, TypeVar, Type, Optional
+from pathlib import Path
+
+T = TypeVar('T')
+
+# Меняется при несовместимых изменениях формата кэша
+CACHE_VERSION = 4
+
+
+class LoadCache:
+    """Кэш уже построенных списков моделей, привязанный к состоянию исходных файлов."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def _cache_path(self, filename: str) -> Path:
+        return self.cache_dir / (filename + ".cache")
+
+    def _stat_key(self, model_class: Type[T], sources: List[Path]) -> tuple:
+        """Быстрая часть ключа: размер и время изменения файлов"""
+        key = [CACHE_VERSION, f"{model_class.__module__}.{model_class.__qualname__}"]
+        for path in sources:
+            stat = path.stat()
+            key.append((path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(key)
+
+    def _hash(self, sources: List[Path]) -> str:
+        """Хэш содержимого файлов: ловит правки с сохраненными размером и временем"""
+        digest = hashlib.blake2b(digest_size=16)
+        for path in sources:
+            digest.update(path.name.encode("utf-8"))
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, filename: str, model_class: Type[T], sources: List[Path]) -> Optional[List[T]]:
+        """Список из кэша или None, если исходные файлы изменились"""
+        cache_path = self._cache_path(filename)
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                stat_key, content_hash = pickle.load(f)
+                if stat_key != self._stat_key(model_class, sources):
+                    return None
+                if content_hash != self._hash(sources):
+                    return None
+                return pickle.load(f)
+        except Exception as e:
+            # Поврежденный или устаревший кэш просто перестраивается
+            print(f"Кэш {cache_path.name} не используется: {e}")
+            return None
+
+    def put(self, filename: str, model_class: Type[T], sources: List[Path], items: List[T]):
+        """Сохранение списка вместе с ключом исходных файлов"""
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            key = (self._stat_key(model_class, sources), self._hash(sources))
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    # Ключ пишется отдельно, чтобы проверять его без распаковки данных
+                    pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_name, self._cache_path(filename))
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Ошибка записи кэша для {filename}: {e}")
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Ограниченный кэш с вытеснением давно не использованных записей.
+
+    Ограничение - число записей и, если задан max_weight, суммарный вес значений
+    (по умолчанию вес - длина значения). Значение тяжелее max_weight не кэшируется.
+    """
+
+    def __init__(self, maxsize: int = 32, max_weight: Optional[int] = None, weigh: Callable[[Any], int] = len):
+        if maxsize < 1:
+            raise ValueError("Размер кэша должен быть положительным.")
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self._weigh = weigh
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._weight = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value):
+        weight = self._weigh(value) if self.max_weight is not None else 0
+        self.discard(key)
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        self._data[key] = (value, weight)
+        self._weight += weight
+        while len(self._data) > self.maxsize or (self.max_weight is not None and self._weight > self.max_weight):
+            _, (_, evicted_weight) = self._data.popitem(last=False)
+            self._weight -= evicted_weight
+
+    def discard(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[1]
+
+    def clear(self):
+        self._data.clear()
+        self._weight = 0
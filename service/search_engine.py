@@ -0,0 +1,235 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Транслитерация кириллицы в латиницу; ключи поиска строятся в латинице,
+# поэтому "Ivanova" и "Иванова" дают один и тот же ключ
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+}
+_TRANSLIT_TABLE = str.maketrans(_CYRILLIC_TO_LATIN)
+
+# Разные системы транслитерации сводятся к одному написанию
+_LATIN_FOLDS = (("kh", "h"), ("ts", "c"), ("j", "y"), ("w", "v"), ("x", "ks"), ("q", "k"))
+
+_WORD = re.compile(r"\w+")
+
+
+def transliterate(text: str) -> str:
+    """Ключ поиска: нижний регистр, латиница, единое написание"""
+    key = text.lower().translate(_TRANSLIT_TABLE)
+    for source, target in _LATIN_FOLDS:
+        key = key.replace(source, target)
+    return key
+
+
+@lru_cache(maxsize=1 << 17)
+def _word_key(word: str) -> str:
+    # Имена и предметы повторяются, поэтому ключ слова запоминается
+    return transliterate(word)
+
+
+def words(text: str) -> List[str]:
+    """Ключи слов текста"""
+    return [_word_key(word) for word in _WORD.findall(text)]
+
+
+def levenshtein(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Расстояние редактирования (вставка, удаление, замена).
+
+    С limit расчет прекращается, как только расстояние точно больше limit, и возвращается limit + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        # Минимум строки в следующих строках не уменьшается
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if limit is None else min(previous[-1], limit + 1)
+
+
+def has_digits(word: str) -> bool:
+    """Номера, телефоны и названия классов ищутся без опечаток"""
+    return any(char.isdigit() for char in word)
+
+
+def max_typos(word: str) -> int:
+    """Допустимое число опечаток для слова запроса"""
+    if len(word) < 4 or has_digits(word):
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+class SearchEngine:
+    """Ранжированный поиск с транслитерацией и опечатками.
+
+    Записи разбираются на слова при первом поиске после добавления, поэтому загрузка
+    модели не тратит на это время. Слова запроса сравниваются со словарем различных
+    слов записей: совпадение слова, начало слова, подстрока или слово с опечатками.
+    Словарь хранится одним текстом (слово на строку), который собирается заново при
+    первом поиске после изменений. Подстрока ищется в этом тексте; для опечаток слово
+    запроса делится на typos + 1 частей, одна из которых по принципу Дирихле входит в
+    подходящее слово без изменений и почти на том же месте, и расстояние считается
+    только у таких слов. Каждое слово запроса должно найтись в записи; записи
+    упорядочены по сумме оценок слов, совпадения в первых полях весят больше.
+    """
+
+    EXACT = 1.0
+    PREFIX = 0.8
+    SUBSTRING = 0.6
+    FUZZY = 0.5
+    # Снижение оценки за каждую опечатку и за каждое следующее поле
+    TYPO_PENALTY = 0.15
+    FIELD_PENALTY = 0.1
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        # id записи -> ключи слов по полям; (номер поля, слово) -> id записей
+        self._words: Dict[int, Tuple[Tuple[str, ...], ...]] = {}
+        self._postings: Dict[Tuple[int, str], Set[int]] = {}
+        # Словарь слов: слово -> число вхождений; его текст, None - собрать заново
+        self._vocabulary: Dict[str, int] = {}
+        self._vocabulary_text: Optional[str] = None
+        # Записи, добавленные после последнего поиска: id -> значения полей
+        self._pending: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._words) + len(self._pending)
+
+    def add(self, item_id: int, values: Sequence[str]):
+        """Добавление записи: values - значения полей в порядке fields"""
+        self.remove(item_id)
+        self._pending[item_id] = tuple(values)
+
+    def _index_pending(self):
+        for item_id, values in self._pending.items():
+            self._index(item_id, values)
+        self._pending.clear()
+
+    def _index(self, item_id: int, values: Sequence[str]):
+        field_words = tuple(tuple(dict.fromkeys(words(str(value)))) for value in values)
+        self._words[item_id] = field_words
+        for column, keys in enumerate(field_words):
+            for word in keys:
+                self._postings.setdefault((column, word), set()).add(item_id)
+                count = self._vocabulary.get(word, 0)
+                if not count:
+                    self._vocabulary_text = None
+                self._vocabulary[word] = count + 1
+
+    def remove(self, item_id: int):
+        if self._pending.pop(item_id, None) is not None:
+            return
+        field_words = self._words.pop(item_id, None)
+        if field_words is None:
+            return
+        for column, keys in enumerate(field_words):
+            for word in keys:
+                postings = self._postings[(column, word)]
+                postings.discard(item_id)
+                if not postings:
+                    del self._postings[(column, word)]
+                count = self._vocabulary[word] - 1
+                if count:
+                    self._vocabulary[word] = count
+                else:
+                    del self._vocabulary[word]
+                    self._vocabulary_text = None
+
+    def search(self, term: str, fields: Optional[Iterable[str]] = None) -> List[int]:
+        """id записей, подходящих под все слова запроса, от более релевантных к менее"""
+        query = words(term)
+        if not query:
+            return []
+        self._index_pending()
+        columns = range(len(self.fields)) if fields is None else [self.fields.index(name) for name in fields]
+        scores: Optional[Dict[int, float]] = None
+        for word in query:
+            word_scores = self._match_word(word, columns)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {item_id: score + word_scores[item_id]
+                          for item_id, score in scores.items() if item_id in word_scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda item_id: (-scores[item_id], item_id))
+
+    def similar_words(self, word: str) -> Dict[str, float]:
+        """Слова словаря, подходящие под слово запроса, с оценкой совпадения"""
+        self._index_pending()
+        text = self._text()
+        matches: Dict[str, float] = {}
+        for key in self._lines_with(text, word):
+            if key == word:
+                matches[key] = self.EXACT
+            elif key.startswith(word):
+                matches[key] = self.PREFIX
+            else:
+                matches[key] = self.SUBSTRING
+        typos = max_typos(word)
+        if typos:
+            for key, distance in self._fuzzy_words(text, word, typos).items():
+                if key not in matches:
+                    matches[key] = self.FUZZY - self.TYPO_PENALTY * distance
+        return matches
+
+    def _text(self) -> str:
+        if self._vocabulary_text is None:
+            self._vocabulary_text = "\n" + "\n".join(self._vocabulary) + "\n"
+        return self._vocabulary_text
+
+    @staticmethod
+    def _lines_with(text: str, part: str):
+        """Слова текста словаря, содержащие part"""
+        position = text.find(part)
+        while position != -1:
+            start = text.rfind("\n", 0, position) + 1
+            end = text.find("\n", position)
+            yield text[start:end]
+            position = text.find(part, end)
+
+    def _fuzzy_words(self, text: str, word: str, typos: int) -> Dict[str, int]:
+        """Слова словаря на расстоянии от 1 до typos от слова запроса"""
+        found: Dict[str, int] = {}
+        checked = {word}
+        size = len(word) // (typos + 1)
+        for number in range(typos + 1):
+            offset = number * size
+            part = word[offset:offset + size] if number < typos else word[offset:]
+            for key in self._lines_with(text, part):
+                if key in checked or abs(len(key) - len(word)) > typos or has_digits(key):
+                    continue
+                # Неизмененная часть сдвигается не больше чем на число опечаток
+                if key.find(part, max(offset - typos, 0), offset + typos + len(part)) == -1:
+                    continue
+                checked.add(key)
+                distance = levenshtein(word, key, typos)
+                if distance <= typos:
+                    found[key] = distance
+        return found
+
+    def _match_word(self, word: str, columns) -> Dict[int, float]:
+        """Лучшая оценка слова запроса для каждой подходящей записи"""
+        scores: Dict[int, float] = {}
+        for key, score in sorted(self.similar_words(word).items(), key=lambda item: item[1]):
+            for column in columns:
+                # Слова идут по возрастанию оценки: более высокая перезаписывает
+                column_score = score - self.FIELD_PENALTY * column
+                postings = self._postings.get((column, key))
+                if postings and column_score > 0:
+                    for item_id in postings:
+                        if scores.get(item_id, 0.0) < column_score:
+                            scores[item_id] = column_score
+        return scores
@@ -0,0 +1,184 @@
+import sqlite3
+from typing import List, TypeVar, Type, Iterable, Iterator, Dict
+from pathlib import Path
+from service.json_service import JSONService
+
+T = TypeVar('T')
+
+# Таблицы, соответствующие JSON файлам: имя таблицы, колонки (в порядке FIELDS модели),
+# схема и индексы
+_TABLES = {
+    "teachers.json": (
+        "teachers",
+        ("id", "full_name", "subject", "experience", "category", "phone"),
+        """CREATE TABLE IF NOT EXISTS teachers (
+               id INTEGER PRIMARY KEY,
+               full_name TEXT NOT NULL,
+               subject TEXT NOT NULL,
+               experience INTEGER NOT NULL,
+               category TEXT NOT NULL,
+               phone TEXT NOT NULL DEFAULT ''
+           )""",
+        ("CREATE INDEX IF NOT EXISTS idx_teachers_subject ON teachers(subject)",
+         "CREATE INDEX IF NOT EXISTS idx_teachers_category ON teachers(category)",
+         "CREATE INDEX IF NOT EXISTS idx_teachers_full_name ON teachers(full_name)"),
+    ),
+    "classrooms.json": (
+        "classrooms",
+        ("id", "class_name", "teacher_id", "student_count", "grade_level"),
+        """CREATE TABLE IF NOT EXISTS classrooms (
+               id INTEGER PRIMARY KEY,
+               class_name TEXT NOT NULL,
+               teacher_id INTEGER NOT NULL,
+               student_count INTEGER NOT NULL,
+               grade_level INTEGER NOT NULL
+           )""",
+        ("CREATE INDEX IF NOT EXISTS idx_classrooms_teacher_id ON classrooms(teacher_id)",
+         "CREATE INDEX IF NOT EXISTS idx_classrooms_grade_level ON classrooms(grade_level)",
+         "CREATE INDEX IF NOT EXISTS idx_classrooms_class_name ON classrooms(class_name)"),
+    ),
+}
+
+class SQLiteService:
+    """Хранилище на SQLite с тем же контрактом load_data/save_data, что и JSONService."""
+
+    def __init__(self, db_path: str = "data/school.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        # WAL: читатели не блокируются во время записи
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Создание таблиц и индексов"""
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            for table, columns, schema, indexes in _TABLES.values():
+                self.connection.execute(schema)
+                for index in indexes:
+                    self.connection.execute(index)
+
+    def _table(self, filename: str):
+        if filename not in _TABLES:
+            raise ValueError(f"Неизвестный набор данных: {filename}")
+        return _TABLES[filename]
+
+    def load_data(self, filename: str, model_class: Type[T]) -> List[T]:
+        """Загрузка всех записей таблицы"""
+        table, columns = self._table(filename)[:2]
+        cursor = self.connection.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+        # Порядок колонок совпадает с FIELDS модели, словари не нужны
+        return [model_class.from_row(row) for row in cursor]
+
+    def iter_data(self, filename: str, model_class: Type[T]) -> Iterator[T]:
+        """Генератор объектов модели поверх курсора"""
+        for batch in self.iter_batches(filename, model_class):
+            yield from batch
+
+    def iter_batches(self, filename: str, model_class: Type[T], batch_size: int = 1000) -> Iterator[List[T]]:
+        """Чтение пачками ограниченного размера для отчетов и выгрузок"""
+        table, columns = self._table(filename)[:2]
+        cursor = self.connection.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [model_class.from_row(row) for row in rows]
+
+    def save_data(self, filename: str, data: List[T]):
+        """Синхронизация таблицы с полным списком записей"""
+        table = self._table(filename)[0]
+        try:
+            with self.connection:
+                existing_ids = {row[0] for row in self.connection.execute(f"SELECT id FROM {table}")}
+                kept_ids = {item.id for item in data}
+                self._upsert(filename, data)
+                self._delete(filename, existing_ids - kept_ids)
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения данных в {table}: {e}")
+            raise
+
+    def save_changes(self, filename: str, data: List[T], upserted: Iterable[T] = (),
+                     deleted: Iterable[int] = ()):
+        """Построчное сохранение изменений"""
+        table = self._table(filename)[0]
+        try:
+            with self.connection:
+                self._upsert(filename, upserted)
+                self._delete(filename, deleted)
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения данных в {table}: {e}")
+            raise
+
+    def load_sequence(self, name: str) -> int:
+        """Последний выданный ID последовательности (0, если ее еще нет)"""
+        row = self.connection.execute("SELECT value FROM sequences WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def save_sequence(self, name: str, value: int):
+        """Сохранение последнего выданного ID последовательности"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO sequences (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    def flush(self):
+        """Изменения фиксируются сразу, отложенных записей нет"""
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        self.connection.close()
+
+    def _upsert(self, filename: str, items: Iterable[T]):
+        table, columns = self._table(filename)[:2]
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+        self.connection.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            (item.to_row() for item in items)
+        )
+
+    def _delete(self, filename: str, ids: Iterable[int]):
+        table = self._table(filename)[0]
+        self.connection.executemany(f"DELETE FROM {table} WHERE id = ?", ((item_id,) for item_id in ids))
+
+    def migrate_from_json(self, data_dir: str = "data") -> Dict[str, int]:
+        """Однократный перенос данных из JSON файлов в пустые таблицы.
+
+        Счетчики ID переносятся вместе со строками: иначе ID удаленных записей выше
+        наибольшего оставшегося были бы выданы повторно.
+        """
+        json_service = JSONService(data_dir)
+        migrated = {}
+        for filename, (table, columns, _, _) in _TABLES.items():
+            # Имя последовательности ID совпадает с именем таблицы
+            last_id = json_service.load_sequence(table)
+            if last_id > self.load_sequence(table):
+                self.save_sequence(table, last_id)
+            if not (json_service.data_dir / filename).exists():
+                continue
+            if self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                # Таблица уже заполнена, повторный перенос не выполняется
+                continue
+            items = json_service.load_records(filename)
+            with self.connection:
+                self.connection.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    ([item[column] for column in columns] for item in items)
+                )
+            migrated[filename] = len(items)
+        return migrated
+
+
+if __name__ == "__main__":
+    service = SQLiteService()
+    for filename, count in service.migrate_from_json().items():
+        print(f"{filename}: перенесено записей: {count}")
+    service.close()
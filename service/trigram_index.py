@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+
+class TrigramIndex:
+    """Инвертированный индекс триграмм для точного поиска подстроки без учета регистра.
+
+    Индексируются ключи полей, уже приведенные casefold (search_keys моделей),
+    запрос приводится так же; транслитерации и опечаток здесь нет, это путь
+    Query.search(term, exact=True). Записи разбираются на триграммы при первом поиске
+    после добавления, поэтому индекс не замедляет загрузку моделей.
+    Запрос из трех и более символов пересекает списки id его триграмм, начиная с
+    самого короткого, и проверяет подстроку только у оставшихся кандидатов.
+    Поля короче трех символов индексируются целиком.
+    """
+
+    N = 3
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        # триграмма -> id записей; символ -> триграммы с ним (для запросов короче триграммы)
+        self._postings: Dict[str, Set[int]] = {}
+        self._grams_by_char: Dict[str, Set[str]] = {}
+        # id -> ключи полей; добавленные после последнего поиска записи
+        self._texts: Dict[int, Tuple[str, ...]] = {}
+        self._pending: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts) + len(self._pending)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._texts or item_id in self._pending
+
+    def _grams(self, text: str) -> Set[str]:
+        if len(text) < self.N:
+            return {text} if text else set()
+        return {text[i:i + self.N] for i in range(len(text) - self.N + 1)}
+
+    def add(self, item_id: int, keys: Sequence[str]):
+        """Добавление записи: keys - ключи полей в casefold в порядке fields"""
+        self.remove(item_id)
+        self._pending[item_id] = tuple(keys)
+
+    def _index_pending(self):
+        for item_id, texts in self._pending.items():
+            self._index(item_id, texts)
+        self._pending.clear()
+
+    def _index(self, item_id: int, texts: Tuple[str, ...]):
+        self._texts[item_id] = texts
+        for gram in set().union(*(self._grams(text) for text in texts)):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = set()
+                for char in set(gram):
+                    self._grams_by_char.setdefault(char, set()).add(gram)
+            postings.add(item_id)
+
+    def remove(self, item_id: int):
+        if self._pending.pop(item_id, None) is not None:
+            return
+        texts = self._texts.pop(item_id, None)
+        if texts is None:
+            return
+        for gram in set().union(*(self._grams(text) for text in texts)):
+            postings = self._postings[gram]
+            postings.discard(item_id)
+            if not postings:
+                del self._postings[gram]
+                for char in set(gram):
+                    grams = self._grams_by_char[char]
+                    grams.discard(gram)
+                    if not grams:
+                        del self._grams_by_char[char]
+
+    def search(self, term: str, fields: Optional[Iterable[str]] = None) -> Optional[Set[int]]:
+        """id записей, у которых хотя бы одно из полей fields содержит term.
+
+        Пустой запрос ничего не ограничивает - возвращается None.
+        """
+        term = term.casefold()
+        if not term:
+            return None
+        self._index_pending()
+        if fields is None:
+            columns = range(len(self.fields))
+        else:
+            columns = [self.fields.index(name) for name in fields]
+
+        if len(term) >= self.N:
+            lists = []
+            for gram in self._grams(term):
+                postings = self._postings.get(gram)
+                if not postings:
+                    return set()
+                lists.append(postings)
+            lists.sort(key=len)
+            candidates = set(lists[0])
+            for postings in lists[1:]:
+                candidates &= postings
+                if not candidates:
+                    break
+        else:
+            # Короткий запрос: объединение списков всех триграмм, в которых он встречается
+            candidates = set()
+            for gram in self._grams_by_char.get(term[0], ()):
+                if term in gram:
+                    candidates |= self._postings[gram]
+
+        if len(term) <= self.N and len(columns) == len(self.fields):
+            # Триграмма запроса или содержащая его триграмма уже гарантирует совпадение
+            return candidates
+        return {item_id for item_id in candidates
+                if any(term in self._texts[item_id][column] for column in columns)}
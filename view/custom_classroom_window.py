@@ -1,6 +1,8 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from view.new_classroom_window import NewClassroomWindow
+from view.virtual_table import VirtualTable
+from view.search_debouncer import SearchDebouncer
 
 class CustomClassroomWindow(ctk.CTkToplevel):
     def __init__(self, parent, classroom_vm, teacher_vm):
@@ -13,6 +15,26 @@ class CustomClassroomWindow(ctk.CTkToplevel):
         self.create_interface()
         self.refresh_table()
 
+        # Таблица обновляется по изменениям классов и ФИО классных руководителей
+        self._unsubscribe = [
+            self.classroom_vm.subscribe(self.on_data_changed),
+            self.teacher_vm.subscribe(self.on_teachers_changed),
+        ]
+        self.bind("<Destroy>", self.on_destroy)
+
+    def on_data_changed(self, changes):
+        self.refresh_table()
+
+    def on_teachers_changed(self, changes):
+        if changes.removed or "full_name" in changes.changed_fields():
+            self.refresh_table()
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.search.cancel()
+            for unsubscribe in self._unsubscribe:
+                unsubscribe()
+
     def create_interface(self):
         """Создание интерфейса управления классами"""
         # Основной контейнер
@@ -79,7 +101,9 @@ class CustomClassroomWindow(ctk.CTkToplevel):
             font=ctk.CTkFont(size=13)
         )
         self.search_entry.pack(side="left", fill="x", expand=True)
-        self.search_entry.bind("<KeyRelease>", self.on_search)
+        # Ввод запускает поиск с задержкой, смена фильтров - сразу
+        self.search = SearchDebouncer(self, self.refresh_table)
+        self.search_entry.bind("<KeyRelease>", self.search.schedule)
         
         # Фильтры
         search_right = ctk.CTkFrame(search_frame, fg_color="transparent")
@@ -152,8 +176,8 @@ class CustomClassroomWindow(ctk.CTkToplevel):
             self.tree.column(col, width=column_config[col])
         
         # Скроллбар
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical")
+        self.table = VirtualTable(self.tree, scrollbar)
         
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -170,47 +194,33 @@ class CustomClassroomWindow(ctk.CTkToplevel):
 
     def on_search(self, event=None):
         """Обработка поиска и фильтрации"""
-        self.refresh_table()
+        self.search.flush()
 
     def refresh_table(self):
         """Обновление таблицы"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        search_term = self.search_entry.get().lower()
         grade_filter = self.grade_filter.get()
         teacher_filter = self.teacher_filter.get()
         
-        # Создаем словарь для быстрого доступа к учителям
-        teacher_map = {teacher.id: teacher.full_name for teacher in self.teacher_vm.teachers}
+        # Фильтры и поиск идут по индексам модели; записи достаются только для видимых строк
+        query = self.classroom_vm.query().search(self.search_entry.get())
         
-        for classroom in self.classroom_vm.classrooms:
-            teacher_name = teacher_map.get(classroom.teacher_id, "Неизвестно")
-            
-            # Поиск
-            if search_term and (search_term not in classroom.class_name.lower() and 
-                              search_term not in teacher_name.lower()):
-                continue
-            
-            # Фильтр по уровню
-            if grade_filter != "Все уровни":
-                required_grade = int(grade_filter.split()[0])
-                if classroom.grade_level != required_grade:
-                    continue
-            
-            # Фильтр по классному руководителю
-            if teacher_filter != "Все руководители" and teacher_name != teacher_filter:
-                continue
-            
-            self.tree.insert("", "end", values=(
-                classroom.id, classroom.class_name, teacher_name, 
-                classroom.student_count, f"{classroom.grade_level} класс"
-            ))
+        # Фильтр по уровню
+        if grade_filter != "Все уровни":
+            query.where(grade_level=int(grade_filter.split()[0]))
+        
+        # Фильтр по классному руководителю
+        if teacher_filter != "Все руководители":
+            teacher = self.teacher_vm.find_teacher_by_name(teacher_filter)
+            query.where(teacher_id=teacher.id if teacher else None)
+
+        self.table.set_data(query.all(), lambda classroom: (
+            classroom.id, classroom.class_name, classroom.teacher_name, 
+            classroom.student_count, f"{classroom.grade_level} класс"
+        ))
 
     def get_selected_id(self):
         """Получить ID выбранного класса"""
-        selection = self.tree.selection()
-        return int(self.tree.item(selection[0])["values"][0]) if selection else None
+        return self.table.selected_id()
 
     def add_classroom(self):
         """Добавить класс"""
@@ -224,7 +234,6 @@ class CustomClassroomWindow(ctk.CTkToplevel):
                     student_count=dialog.result["student_count"],
                     grade_level=dialog.result["grade_level"]
                 )
-                self.refresh_table()
             except ValueError as e:
                 messagebox.showerror("Ошибка", str(e))
 
@@ -255,7 +264,6 @@ class CustomClassroomWindow(ctk.CTkToplevel):
                     student_count=dialog.result["student_count"],
                     grade_level=dialog.result["grade_level"]
                 )
-                self.refresh_table()
         except ValueError as e:
             messagebox.showerror("Ошибка", str(e))
 
@@ -269,23 +277,23 @@ class CustomClassroomWindow(ctk.CTkToplevel):
         if messagebox.askyesno("Подтверждение", "Удалить выбранный класс?"):
             try:
                 self.classroom_vm.delete_classroom(classroom_id)
-                self.refresh_table()
             except ValueError as e:
                 messagebox.showerror("Ошибка", str(e))
 
     def show_stats(self):
         """Показать статистику по классам"""
-        total_classrooms = len(self.classroom_vm.classrooms)
-        total_students = sum(classroom.student_count for classroom in self.classroom_vm.classrooms)
-        avg_students = total_students / total_classrooms if total_classrooms > 0 else 0
+        # Итоги и группировки по колонкам числовых полей, без обхода объектов классов
+        columns = self.classroom_vm.columns
+        total_classrooms = len(columns)
+        total_students = columns.total_students()
+        avg_students = columns.average_students()
         
         # Статистика по уровням
-        grade_stats = {}
-        for classroom in self.classroom_vm.classrooms:
-            if classroom.grade_level not in grade_stats:
-                grade_stats[classroom.grade_level] = {"count": 0, "students": 0}
-            grade_stats[classroom.grade_level]["count"] += 1
-            grade_stats[classroom.grade_level]["students"] += classroom.student_count
+        students_by_grade = columns.students_by_grade()
+        grade_stats = {
+            grade_level: {"count": count, "students": students_by_grade[grade_level]}
+            for grade_level, count in columns.grade_histogram().items()
+        }
         
         # Создаем окно статистики
         stats_window = ctk.CTkToplevel(self)
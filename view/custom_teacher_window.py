@@ -1,6 +1,9 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from view.new_teacher_window import NewTeacherWindow
+from view.virtual_table import VirtualTable
+from view.search_debouncer import SearchDebouncer
+from model.vocabulary import SUBJECTS, CATEGORIES
 
 class CustomTeacherWindow(ctk.CTkToplevel):
     def __init__(self, parent, view_model):
@@ -12,6 +15,18 @@ class CustomTeacherWindow(ctk.CTkToplevel):
         self.create_interface()
         self.refresh_table()
 
+        # Таблица обновляется по изменениям модели, в том числе сделанным из других окон
+        self._unsubscribe = self.vm.subscribe(self.on_data_changed)
+        self.bind("<Destroy>", self.on_destroy)
+
+    def on_data_changed(self, changes):
+        self.refresh_table()
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.search.cancel()
+            self._unsubscribe()
+
     def create_interface(self):
         """Создание интерфейса управления учителями"""
         # Основной контейнер
@@ -78,7 +93,9 @@ class CustomTeacherWindow(ctk.CTkToplevel):
             font=ctk.CTkFont(size=13)
         )
         self.search_entry.pack(side="left", fill="x", expand=True)
-        self.search_entry.bind("<KeyRelease>", self.on_search)
+        # Ввод запускает поиск с задержкой, смена фильтров - сразу
+        self.search = SearchDebouncer(self, self.refresh_table)
+        self.search_entry.bind("<KeyRelease>", self.search.schedule)
         
         # Фильтры
         search_right = ctk.CTkFrame(search_frame, fg_color="transparent")
@@ -148,8 +165,8 @@ class CustomTeacherWindow(ctk.CTkToplevel):
             self.tree.column(col, width=column_config[col])
         
         # Скроллбар
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical")
+        self.table = VirtualTable(self.tree, scrollbar)
         
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -166,41 +183,32 @@ class CustomTeacherWindow(ctk.CTkToplevel):
 
     def on_search(self, event=None):
         """Обработка поиска и фильтрации"""
-        self.refresh_table()
+        self.search.flush()
 
     def refresh_table(self):
         """Обновление таблицы"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        search_term = self.search_entry.get().lower()
         subject_filter = self.subject_filter.get()
         category_filter = self.category_filter.get()
         
-        for teacher in self.vm.teachers:
-            # Поиск
-            if search_term and (search_term not in teacher.full_name.lower() and 
-                              search_term not in teacher.subject.lower() and
-                              search_term not in teacher.phone.lower()):
-                continue
-            
-            # Фильтр по предмету
-            if subject_filter != "Все предметы" and teacher.subject != subject_filter:
-                continue
-            
-            # Фильтр по категории
-            if category_filter != "Все категории" and teacher.category != category_filter:
-                continue
-            
-            self.tree.insert("", "end", values=(
-                teacher.id, teacher.full_name, teacher.subject, 
-                f"{teacher.experience} лет", teacher.category, teacher.phone
-            ))
+        # Фильтры и поиск идут по индексам модели; записи достаются только для видимых строк
+        query = self.vm.query().search(self.search_entry.get())
+        
+        # Фильтр по предмету
+        if subject_filter != "Все предметы":
+            query.where(subject_code=SUBJECTS.code_of(subject_filter))
+        
+        # Фильтр по категории
+        if category_filter != "Все категории":
+            query.where(category_code=CATEGORIES.code_of(category_filter))
+
+        self.table.set_data(query.all(), lambda teacher: (
+            teacher.id, teacher.full_name, teacher.subject, 
+            f"{teacher.experience} лет", teacher.category, teacher.phone
+        ))
 
     def get_selected_id(self):
         """Получить ID выбранного учителя"""
-        selection = self.tree.selection()
-        return int(self.tree.item(selection[0])["values"][0]) if selection else None
+        return self.table.selected_id()
 
     def add_teacher(self):
         """Добавить учителя"""
@@ -215,7 +223,6 @@ class CustomTeacherWindow(ctk.CTkToplevel):
                     category=dialog.result["category"],
                     phone=dialog.result["phone"]
                 )
-                self.refresh_table()
             except ValueError as e:
                 messagebox.showerror("Ошибка", str(e))
 
@@ -247,7 +254,6 @@ class CustomTeacherWindow(ctk.CTkToplevel):
                     category=dialog.result["category"],
                     phone=dialog.result["phone"]
                 )
-                self.refresh_table()
         except ValueError as e:
             messagebox.showerror("Ошибка", str(e))
 
@@ -261,27 +267,17 @@ class CustomTeacherWindow(ctk.CTkToplevel):
         if messagebox.askyesno("Подтверждение", "Удалить выбранного учителя?"):
             try:
                 self.vm.delete_teacher(teacher_id)
-                self.refresh_table()
             except ValueError as e:
                 messagebox.showerror("Ошибка", str(e))
 
     def show_stats(self):
         """Показать статистику по учителям"""
-        total_teachers = len(self.vm.teachers)
+        aggregates = self.vm.aggregates
+        total_teachers = aggregates.count
         
-        # Статистика по предметам
-        subject_stats = {}
-        for teacher in self.vm.teachers:
-            if teacher.subject not in subject_stats:
-                subject_stats[teacher.subject] = 0
-            subject_stats[teacher.subject] += 1
-        
-        # Статистика по категориям
-        category_stats = {}
-        for teacher in self.vm.teachers:
-            if teacher.category not in category_stats:
-                category_stats[teacher.category] = 0
-            category_stats[teacher.category] += 1
+        # Статистика по предметам и категориям (счетчики по кодам)
+        subject_stats = {SUBJECTS.decode(code): count for code, count in aggregates.counts("subject_code").items()}
+        category_stats = {CATEGORIES.decode(code): count for code, count in aggregates.counts("category_code").items()}
         
         # Создаем окно статистики
         stats_window = ctk.CTkToplevel(self)
@@ -306,7 +302,7 @@ class CustomTeacherWindow(ctk.CTkToplevel):
         
         stats_data = [
             ("Всего учителей:", str(total_teachers), "#3498db"),
-            ("Средний стаж:", f"{sum(t.experience for t in self.vm.teachers) / total_teachers:.1f} лет", "#27ae60")
+            ("Средний стаж:", f"{aggregates.mean('experience'):.1f} лет", "#27ae60")
         ]
         
         for text, value, color in stats_data:
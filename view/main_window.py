@@ -75,9 +75,9 @@ class MainWindow(tk.Tk):
             self.tree.delete(item)
 
         # Обновление статистики
-        total_teachers = len(self.teacher_vm.teachers)
-        total_classrooms = len(self.classroom_vm.classrooms)
-        total_students = sum(classroom.student_count for classroom in self.classroom_vm.classrooms)
+        total_teachers = self.teacher_vm.aggregates.count
+        total_classrooms = self.classroom_vm.aggregates.count
+        total_students = self.classroom_vm.aggregates.sum("student_count")
         
         self.stats_label.config(
             text=f"Учителей: {total_teachers} | Классов: {total_classrooms} | Учеников: {total_students}"
@@ -0,0 +1,35 @@
+from typing import Callable, Optional
+
+
+class SearchDebouncer:
+    """Отложенный запуск поиска при вводе.
+
+    Каждое нажатие переносит запуск на delay_ms миллисекунд через after();
+    запрос, который перекрыт следующим нажатием, отменяется и не выполняется.
+    """
+
+    def __init__(self, widget, callback: Callable[[], None], delay_ms: int = 200):
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._after_id: Optional[str] = None
+
+    def schedule(self, event=None):
+        """Запланировать поиск, отменив ранее запланированный"""
+        self.cancel()
+        self._after_id = self.widget.after(self.delay_ms, self._run)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self, event=None):
+        """Выполнить поиск сразу (смена фильтра, Enter)"""
+        self.cancel()
+        self.callback()
+
+    def _run(self):
+        self._after_id = None
+        self.callback()
+
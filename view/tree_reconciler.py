@@ -0,0 +1,54 @@
+from typing import Dict, Iterable, List, Tuple
+
+
+class TreeReconciler:
+    """Синхронизация ttk.Treeview со списком строк по id записи.
+
+    id записи служит iid строки таблицы. При обновлении сравниваются желаемые строки
+    с показанными, и в Tk уходят только нужные вызовы: удаление пропавших строк одним
+    вызовом, item для измененных, insert для новых и set_children при смене порядка.
+    """
+
+    # Сколько новых строк вставлять по номеру позиции, а не через set_children
+    MAX_POSITIONED_INSERTS = 32
+
+    def __init__(self, tree):
+        self.tree = tree
+        # iid -> значения, показанные в таблице, и порядок строк на экране
+        self._values: Dict[str, tuple] = {}
+        self._order: List[str] = []
+
+    def reconcile(self, rows: Iterable[Tuple[int, tuple]]):
+        """Привести таблицу к строкам (id записи, значения колонок) в заданном порядке"""
+        desired = [(str(item_id), tuple(values)) for item_id, values in rows]
+        positions = {iid: index for index, (iid, _) in enumerate(desired)}
+
+        removed = [iid for iid in self._order if iid not in positions]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                del self._values[iid]
+
+        # Новые строки вставляются на свои места, только если их немного и оставшиеся строки
+        # уже стоят по порядку: вставка по номеру в Tk линейна. Иначе - в конец и set_children.
+        kept = [positions[iid] for iid in self._order if iid in positions]
+        last_kept = kept[-1] if kept else -1
+        middle = sum(1 for iid, _ in desired if iid not in self._values and positions[iid] < last_kept)
+        in_place = middle <= self.MAX_POSITIONED_INSERTS and all(a < b for a, b in zip(kept, kept[1:]))
+
+        for index, (iid, values) in enumerate(desired):
+            current = self._values.get(iid)
+            if current is None:
+                self.tree.insert("", index if in_place and index < last_kept else "end", iid=iid, values=values)
+            elif current != values:
+                self.tree.item(iid, values=values)
+            self._values[iid] = values
+
+        order = [iid for iid, _ in desired]
+        if not in_place:
+            self.tree.set_children("", *order)
+        self._order = order
+
+    def clear(self):
+        """Удаление всех строк"""
+        self.reconcile(())
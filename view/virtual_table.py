@@ -0,0 +1,137 @@
+from tkinter import ttk
+from typing import Callable, Optional, Sequence
+from view.tree_reconciler import TreeReconciler
+
+
+class VirtualTable:
+    """Виртуальная прокрутка для ttk.Treeview.
+
+    В таблице живет только экран строк: позиция полосы прокрутки отображается на срез
+    списка результатов в памяти, строки формируются только для видимого среза.
+    Выбранная запись запоминается по id и остается выбранной после прокрутки.
+    """
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.reconciler = TreeReconciler(tree)
+        self._items: Sequence = ()
+        self._to_row: Callable = tuple
+        self._key: Callable = lambda item: item.id
+        self._top = 0
+        self._visible = int(tree.cget("height"))
+        self._row_height = int(ttk.Style().lookup(tree.cget("style") or "Treeview", "rowheight") or 20)
+        self._selected_id: Optional[int] = None
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_configure)
+        tree.bind("<<TreeviewSelect>>", self._on_select)
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        tree.bind("<Up>", lambda e: self._move_selection(-1))
+        tree.bind("<Down>", lambda e: self._move_selection(1))
+        tree.bind("<Prior>", lambda e: self._move_selection(-self._visible))
+        tree.bind("<Next>", lambda e: self._move_selection(self._visible))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def set_data(self, items: Sequence, to_row: Callable, key: Callable = None):
+        """Новый список результатов; to_row строит значения колонок для видимых записей"""
+        self._items = items
+        self._to_row = to_row
+        if key is not None:
+            self._key = key
+        # Выбор переживает прокрутку, но не исчезновение записи из результатов
+        if self._selected_id is not None and not self._contains(items, self._selected_id):
+            self._selected_id = None
+        self._render()
+
+    def _contains(self, items: Sequence, item_id: int) -> bool:
+        # У результата запроса есть список id: записи не достаются
+        ids = getattr(items, "ids", None)
+        if ids is not None:
+            return item_id in ids
+        return any(self._key(item) == item_id for item in items)
+
+    def selected_id(self) -> Optional[int]:
+        """id выбранной записи, даже если она прокручена за пределы экрана"""
+        return self._selected_id
+
+    def yview(self, *args):
+        """Команда полосы прокрутки: moveto доля или scroll n units/pages"""
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * len(self._items)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._visible if args[2] == "pages" else 1)
+            self._scroll_by(step)
+
+    def see(self, index: int):
+        """Прокрутка так, чтобы строка index списка результатов была видна"""
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + self._visible:
+            self._scroll_to(index - self._visible + 1)
+
+    def _scroll_by(self, step: int):
+        self._scroll_to(self._top + step)
+        return "break"
+
+    def _scroll_to(self, top: int):
+        top = max(0, min(top, len(self._items) - self._visible))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _render(self):
+        self._top = max(0, min(self._top, len(self._items) - self._visible))
+        window = self._items[self._top:self._top + self._visible]
+        self.reconciler.reconcile((self._key(item), self._to_row(item)) for item in window)
+
+        iid = str(self._selected_id)
+        if self._selected_id is not None and self.tree.exists(iid):
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = len(self._items)
+        if total:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_configure(self, event):
+        # Строк помещается на экран за вычетом заголовка примерно в одну строку
+        visible = max(1, event.height // self._row_height - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self._selected_id = int(selection[0])
+        elif self._selected_id is not None and self.tree.exists(str(self._selected_id)):
+            # Выбор снят пользователем, а не удалением строки при прокрутке
+            self._selected_id = None
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _move_selection(self, step: int):
+        """Перемещение выбора клавишами с прокруткой за пределы экрана"""
+        if not self._items:
+            return "break"
+        window = [self._key(item) for item in self._items[self._top:self._top + self._visible]]
+        if self._selected_id in window:
+            index = self._top + window.index(self._selected_id)
+        else:
+            index = self._top - step if step > 0 else self._top + len(window) - step - 1
+        index = max(0, min(index + step, len(self._items) - 1))
+        self._selected_id = self._key(self._items[index])
+        self.see(index)
+        self._render()
+        self.tree.focus(str(self._selected_id))
+        return "break"
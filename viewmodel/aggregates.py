@@ -0,0 +1,86 @@
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+
+class Aggregates:
+    """Сводные показатели записей, обновляемые за O(1) при добавлении и удалении записи.
+
+    group_by - поля, по значениям которых считается количество записей;
+    values - числовые поля с суммой и гистограммой значений (из нее min/max/среднее);
+    sum_by - пары (поле группы из group_by, числовое поле) для сумм по группам.
+    Модель представления вызывает add/remove из своих _index_add/_index_remove.
+    version растет при каждом изменении: по нему отчеты узнают, что данные те же.
+    """
+
+    def __init__(self, group_by: Sequence[str] = (), values: Sequence[str] = (),
+                 sum_by: Iterable[Tuple[str, str]] = ()):
+        self.count = 0
+        self.version = 0
+        self._groups: Dict[str, Dict] = {field: {} for field in group_by}
+        self._histograms: Dict[str, Dict] = {field: {} for field in values}
+        self._sums: Dict[str, int] = {field: 0 for field in values}
+        self._group_sums: Dict[Tuple[str, str], Dict] = {}
+        for group, field in sum_by:
+            if group not in self._groups:
+                raise ValueError(f"Поле группы {group} должно быть в group_by.")
+            self._group_sums[(group, field)] = {}
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        """Удаление записи (до изменения ее полей)"""
+        self._apply(record, -1)
+
+    def _apply(self, record, sign: int):
+        self.count += sign
+        self.version += 1
+        for field, counts in self._groups.items():
+            _bump(counts, getattr(record, field), sign)
+        for field, histogram in self._histograms.items():
+            value = getattr(record, field)
+            _bump(histogram, value, sign)
+            self._sums[field] += sign * value
+        for (group, field), sums in self._group_sums.items():
+            key = getattr(record, group)
+            if key in self._groups[group]:
+                sums[key] = sums.get(key, 0) + sign * getattr(record, field)
+            else:
+                # Последняя запись группы удалена
+                sums.pop(key, None)
+
+    def counts(self, field: str) -> Dict:
+        """Количество записей по значениям поля"""
+        return dict(self._groups[field])
+
+    def count_of(self, field: str, value) -> int:
+        return self._groups[field].get(value, 0)
+
+    def sum(self, field: str) -> int:
+        return self._sums[field]
+
+    def mean(self, field: str) -> float:
+        return self._sums[field] / self.count if self.count else 0
+
+    def min(self, field: str) -> Optional[int]:
+        # Различных значений немного (стаж, число учеников), поэтому обход гистограммы дешев
+        return min(self._histograms[field], default=None)
+
+    def max(self, field: str) -> Optional[int]:
+        return max(self._histograms[field], default=None)
+
+    def histogram(self, field: str) -> Dict[int, int]:
+        """Количество записей по значениям числового поля в порядке возрастания значений"""
+        histogram = self._histograms[field]
+        return {value: histogram[value] for value in sorted(histogram)}
+
+    def sums_by(self, group: str, field: str) -> Dict:
+        """Сумма числового поля по значениям поля группы"""
+        return dict(self._group_sums[(group, field)])
+
+
+def _bump(counts: Dict, key, sign: int):
+    count = counts.get(key, 0) + sign
+    if count:
+        counts[key] = count
+    else:
+        del counts[key]
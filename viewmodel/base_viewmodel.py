@@ -0,0 +1,225 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, List, Callable, Dict, Optional, Set, Tuple
+from service.lru_cache import LRUCache
+from viewmodel.change_set import ChangeSet
+from viewmodel.errors import BulkValidationError, check_row_types
+
+
+class UndoLog:
+    """Журнал отката транзакции: записи в состоянии до их первого изменения.
+
+    before - id -> (запись, кортеж полей до изменения); None вместо кортежа - запись новая.
+    removed - (id, позиция в списке записей) удаленных записей в порядке удаления.
+    """
+
+    def __init__(self, pending_upserts: dict, pending_deletes: set, pending_changes: ChangeSet):
+        self.before: Dict[int, Tuple[object, Optional[tuple]]] = {}
+        self.removed: List[Tuple[int, int]] = []
+        self.pending_upserts = pending_upserts
+        self.pending_deletes = pending_deletes
+        self.pending_changes = pending_changes
+
+
+class BaseViewModel(ABC):
+    """Общая часть моделей представления: сохранение изменений и уведомления, в том числе пакетные."""
+
+    # Файл данных модели
+    FILENAME = None
+    # Типы полей строк пакетных операций
+    ROW_TYPES: Dict[str, type] = {}
+    # Кэш результатов запросов: число запросов и суммарное число id в них
+    QUERY_CACHE_SIZE = 32
+    QUERY_CACHE_WEIGHT = 2_000_000
+
+    def __init__(self, json_service):
+        self.json_service = json_service
+        self._on_data_changed: Callable[[], None] = None
+        # Подписчики на наборы изменений и номер версии данных
+        self._subscribers: List[Callable[[ChangeSet], None]] = []
+        self.version = 0
+        # Пакет изменений: глубина вложенности, отложенные записи и изменения для уведомления
+        self._batch_depth = 0
+        self._pending_upserts: Dict[int, object] = {}
+        self._pending_deletes: Set[int] = set()
+        self._pending_changes = ChangeSet()
+        # Журналы открытых транзакций (вложенные - по одному на уровень)
+        self._undo_logs: List[UndoLog] = []
+        self.query_cache = LRUCache(self.QUERY_CACHE_SIZE, self.QUERY_CACHE_WEIGHT)
+
+    @abstractmethod
+    def _records(self) -> List:
+        """Текущий список записей модели"""
+
+    def set_on_data_changed(self, callback: Callable[[], None]):
+        """Обратный вызов без аргументов (для совместимости); вызывается после подписчиков"""
+        self._on_data_changed = callback
+
+    def subscribe(self, callback: Callable[[ChangeSet], None]) -> Callable[[], None]:
+        """Подписка на наборы изменений; возвращает функцию отписки"""
+        self._subscribers.append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+        return unsubscribe
+
+    def query_version(self):
+        """Версия данных для кэша запросов; None внутри пакета - кэш не используется"""
+        return None if self._batch_depth else self.version
+
+    def _notify(self, changes: ChangeSet):
+        """Публикация изменений (внутри пакета - одним набором в конце пакета)"""
+        if self._batch_depth:
+            self._pending_changes.merge(changes)
+            return
+        if not changes:
+            return
+        self.version += 1
+        changes.version = self.version
+        for callback in list(self._subscribers):
+            callback(changes)
+        if self._on_data_changed:
+            self._on_data_changed()
+
+    def _save_data(self, upserted=(), deleted=()):
+        """Сохранение изменений в JSON файл (внутри пакета - в конце пакета)"""
+        if self._batch_depth:
+            for item in upserted:
+                self._pending_upserts[item.id] = item
+                self._pending_deletes.discard(item.id)
+            for item_id in deleted:
+                self._pending_upserts.pop(item_id, None)
+                self._pending_deletes.add(item_id)
+            return
+        self.json_service.save_changes(self.FILENAME, self._records(), upserted, deleted)
+
+    @contextmanager
+    def batch(self):
+        """Пакет изменений: одна запись на диск и одно уведомление при выходе из внешнего пакета"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._write_batch()
+                self._notify_batch()
+
+    def _write_batch(self):
+        """Запись накопленных в пакете изменений"""
+        upserted = list(self._pending_upserts.values())
+        deleted = sorted(self._pending_deletes)
+        self._pending_upserts = {}
+        self._pending_deletes = set()
+        if upserted or deleted:
+            self._save_data(upserted, deleted)
+
+    def _write_upserts(self):
+        """Запись только добавленных и измененных записей пакета; удаления остаются отложенными.
+
+        Полный снимок в этом случае еще содержит удаленные записи.
+        """
+        upserted = list(self._pending_upserts.values())
+        self._pending_upserts = {}
+        if not upserted:
+            return
+        data = self._records()
+        removed = [self._pending_changes.removed[item_id] for item_id in self._pending_deletes
+                   if item_id in self._pending_changes.removed]
+        if removed:
+            data = sorted([*data, *removed], key=lambda item: item.id)
+        self.json_service.save_changes(self.FILENAME, data, upserted, ())
+
+    def _notify_batch(self):
+        """Отложенное уведомление пакета"""
+        changes, self._pending_changes = self._pending_changes, ChangeSet()
+        self._notify(changes)
+
+    @abstractmethod
+    def _set_records(self, records: List):
+        """Замена списка записей модели"""
+
+    @abstractmethod
+    def _has_record(self, item_id: int) -> bool:
+        """Есть ли запись с таким ID"""
+
+    def _check_rows(self, rows: List[dict], check_row: Callable[[int, dict], Any]) -> list:
+        """Проверка строк пакета: типы полей по ROW_TYPES, затем check_row(номер, строка).
+
+        Ошибки собираются по всем строкам и поднимаются одним BulkValidationError;
+        без ошибок возвращаются результаты check_row по порядку строк.
+        """
+        results = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                check_row_types(row, self.ROW_TYPES)
+                results.append(check_row(index, row))
+            except KeyError as e:
+                errors.append((index, f"Не указано поле {e.args[0]}."))
+            except ValueError as e:
+                errors.append((index, str(e)))
+        if errors:
+            raise BulkValidationError(errors)
+        return results
+
+    def _drop_records(self, item_ids: Set[int]):
+        """Удаление записей из списка; открытые журналы отката запоминают их позиции"""
+        records = self._records()
+        if self._undo_logs:
+            for index, item in enumerate(records):
+                if item.id in item_ids:
+                    for log in self._undo_logs:
+                        log.removed.append((item.id, index))
+        self._set_records([item for item in records if item.id not in item_ids])
+
+    def _begin_undo(self) -> UndoLog:
+        """Начало записи журнала отката; записи сохраняются только при первом изменении"""
+        log = UndoLog(dict(self._pending_upserts), set(self._pending_deletes), self._pending_changes.copy())
+        self._undo_logs.append(log)
+        return log
+
+    def _end_undo(self, log: UndoLog):
+        self._undo_logs.remove(log)
+
+    def _remember(self, item, new: bool = False):
+        """Вызывается из _index_remove до изменения записи и из _index_add для новой записи"""
+        for log in self._undo_logs:
+            if item.id not in log.before:
+                log.before[item.id] = (item, None if new else item.to_row())
+
+    def _undo(self, log: UndoLog):
+        """Откат затронутых записей к состоянию из журнала; остальные записи не трогаются"""
+        self._end_undo(log)
+        # Записи, которые сейчас есть в модели, выходят из индексов (в открытые журналы они уже попали)
+        present = {item_id for item_id, (item, _) in log.before.items() if self._has_record(item_id)}
+        for item_id in present:
+            self._index_remove(log.before[item_id][0])
+        restored = []
+        for item_id, (item, row) in log.before.items():
+            if row is None:
+                continue
+            for name, value in zip(item.FIELDS, row):
+                setattr(item, name, value)
+            restored.append(item)
+
+        new_ids = {item_id for item_id, (_, row) in log.before.items() if row is None}
+        lost = [item for item in restored if item.id not in present]
+        if new_ids or lost:
+            # Новые записи стоят в конце списка, поэтому их удаление не сдвигает прежние;
+            # удаленные возвращаются на свои позиции в обратном порядке удаления
+            records = [item for item in self._records() if item.id not in new_ids]
+            returned = set()
+            for item_id, index in reversed(log.removed):
+                if item_id not in new_ids and item_id not in present and item_id not in returned:
+                    records.insert(index, log.before[item_id][0])
+                    returned.add(item_id)
+            # Запись убрана из списка в обход _drop_records: позиция неизвестна
+            records += [item for item in lost if item.id not in returned]
+            self._set_records(records)
+        for item in restored:
+            self._index_add(item)
+        self._pending_upserts = log.pending_upserts
+        self._pending_deletes = log.pending_deletes
+        self._pending_changes = log.pending_changes
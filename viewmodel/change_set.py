@@ -0,0 +1,63 @@
+from typing import Dict, Any, Tuple
+
+
+class ChangeSet:
+    """Изменения модели за одну операцию или пакет.
+
+    added и removed - id -> запись, updated - id -> {поле: (старое значение, новое значение)}.
+    version - номер версии модели после применения изменений.
+    """
+
+    __slots__ = ("added", "updated", "removed", "version")
+
+    def __init__(self, added: Dict[int, Any] = None, updated: Dict[int, Dict[str, Tuple[Any, Any]]] = None,
+                 removed: Dict[int, Any] = None):
+        self.added = dict(added or {})
+        self.updated = {item_id: fields for item_id, fields in (updated or {}).items() if fields}
+        self.removed = dict(removed or {})
+        self.version = None
+
+    @classmethod
+    def diff(cls, item, before: tuple) -> "ChangeSet":
+        """Изменение записи по кортежу ее полей до изменения (в порядке FIELDS)"""
+        fields = {name: (old, new) for name, old, new in zip(item.FIELDS, before, item.to_row()) if old != new}
+        return cls(updated={item.id: fields})
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def changed_fields(self) -> set:
+        """Имена всех измененных полей"""
+        return {name for fields in self.updated.values() for name in fields}
+
+    def copy(self) -> "ChangeSet":
+        changes = ChangeSet(self.added, {item_id: dict(fields) for item_id, fields in self.updated.items()},
+                            self.removed)
+        changes.version = self.version
+        return changes
+
+    def merge(self, other: "ChangeSet"):
+        """Добавление следующих по времени изменений"""
+        self.added.update(other.added)
+        for item_id, fields in other.updated.items():
+            if item_id in self.added:
+                # Запись добавлена в этом же наборе: достаточно отметки о добавлении
+                continue
+            merged = self.updated.setdefault(item_id, {})
+            for name, (old, new) in fields.items():
+                if name in merged:
+                    old = merged[name][0]
+                if old == new:
+                    merged.pop(name, None)
+                else:
+                    merged[name] = (old, new)
+            if not merged:
+                del self.updated[item_id]
+        for item_id, item in other.removed.items():
+            self.updated.pop(item_id, None)
+            if self.added.pop(item_id, None) is None:
+                self.removed[item_id] = item
+
+    def __repr__(self):
+        return (f"ChangeSet(added={sorted(self.added)}, updated={self.updated}, "
+                f"removed={sorted(self.removed)}, version={self.version})")
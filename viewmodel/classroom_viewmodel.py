@@ -1,31 +1,118 @@
-from typing import List, Callable
+from typing import List, Dict, Iterable
 from model.classroom import Classroom
+from model.classroom_columns import ClassroomColumns
 from service.json_service import JSONService
+from service.id_sequence import IdSequence
+from service.search_engine import SearchEngine
+from service.trigram_index import TrigramIndex
+from viewmodel.base_viewmodel import BaseViewModel
+from viewmodel.change_set import ChangeSet
+from viewmodel.aggregates import Aggregates
+from viewmodel.query import FieldIndexes, Query
+from viewmodel.relationship_registry import RelationshipRegistry
 
-class ClassroomViewModel:
-    def __init__(self, teacher_vm, json_service: JSONService):
+class ClassroomViewModel(BaseViewModel):
+    FILENAME = "classrooms.json"
+    # Типы полей строк пакетных операций
+    ROW_TYPES = {"id": int, "class_name": str, "teacher_id": int, "student_count": int, "grade_level": int}
+
+    def __init__(self, teacher_vm, json_service: JSONService, relations: RelationshipRegistry = None):
+        super().__init__(json_service)
         self.teacher_vm = teacher_vm
-        self.json_service = json_service
+        # Общий с моделью учителей реестр связей учитель -> классы
+        self.relations = relations or teacher_vm.relations
+        self.relations.attach_classrooms(self)
         # Загрузка данных из JSON при инициализации
-        self._classrooms: List[Classroom] = self.json_service.load_data("classrooms.json", Classroom)
-        self._on_data_changed: Callable[[], None] = None
+        self._classrooms: List[Classroom] = self.json_service.load_data(self.FILENAME, Classroom)
+        # Индексы: id -> класс и название без учета регистра -> id
+        self._by_id: Dict[int, Classroom] = {}
+        self._id_by_name: Dict[str, int] = {}
+        # Ранжированный поиск по названию и ФИО классного руководителя
+        self.search_engine = SearchEngine(("class_name", "teacher_name"))
+        # Точный поиск подстроки по тем же полям
+        self.substrings = TrigramIndex(("class_name", "teacher_name"))
+        # Колоночная копия числовых полей для векторной статистики окна классов
+        self.columns = ClassroomColumns()
+        # Индексы полей для запросов: равенство, диапазоны и сортировка
+        self.indexes = FieldIndexes(("teacher_id", "grade_level", "student_count"))
+        # Сводные показатели для статистики: по уровням и числу учеников
+        self.aggregates = Aggregates(group_by=("grade_level",), values=("student_count",),
+                                     sum_by=(("grade_level", "student_count"),))
+        for classroom in self._classrooms:
+            self._index_add(classroom)
+        # Последовательность ID: без сканирования списка и без повторного использования
+        self._ids = IdSequence(json_service, "classrooms", floor=max(self._by_id, default=0))
+        # Переименование учителя меняет ФИО в индексе поиска его классов
+        self.teacher_vm.subscribe(self._on_teachers_changed)
 
     @property
     def classrooms(self) -> List[Classroom]:
         return self._classrooms
 
-    def set_on_data_changed(self, callback: Callable[[], None]):
-        self._on_data_changed = callback
+    def _records(self) -> List[Classroom]:
+        return self._classrooms
+
+    def _set_records(self, records: List[Classroom]):
+        self._classrooms = records
 
-    def _notify(self):
-        if self._on_data_changed:
-            self._on_data_changed()
+    def _has_record(self, item_id: int) -> bool:
+        return item_id in self._by_id
 
-    def _save_data(self):
-        """Сохранение данных в JSON файл"""
-        self.json_service.save_data("classrooms.json", self._classrooms)
+    def _index_add(self, classroom: Classroom):
+        """Добавление класса в индексы"""
+        if self._undo_logs:
+            self._remember(classroom, classroom.id not in self._by_id)
+        self._by_id[classroom.id] = classroom
+        self._id_by_name[classroom.name_key] = classroom.id
+        self.relations.link(classroom.teacher_id, classroom.id)
+        self.columns.add(classroom)
+        self.indexes.add(classroom)
+        self.aggregates.add(classroom)
+        self._index_search(classroom)
 
-    def add_classroom(self, class_name: str, teacher_id: int, student_count: int, grade_level: int):
+    def _index_remove(self, classroom: Classroom):
+        """Удаление класса из индексов (до изменения его полей)"""
+        if self._undo_logs:
+            self._remember(classroom)
+        self._by_id.pop(classroom.id, None)
+        name_key = classroom.name_key
+        if self._id_by_name.get(name_key) == classroom.id:
+            del self._id_by_name[name_key]
+        self.relations.unlink(classroom.teacher_id, classroom.id)
+        self.columns.remove(classroom.id)
+        self.search_engine.remove(classroom.id)
+        self.substrings.remove(classroom.id)
+        self.indexes.remove(classroom)
+        self.aggregates.remove(classroom)
+
+    def _index_search(self, classroom: Classroom):
+        """Индексы поиска по названию класса и ФИО классного руководителя"""
+        classroom.teacher_name = self.teacher_name(classroom.teacher_id)
+        self.search_engine.add(classroom.id, classroom.search_keys)
+        self.substrings.add(classroom.id, classroom.search_keys)
+
+    def teacher_name(self, teacher_id: int) -> str:
+        """ФИО классного руководителя для отображения и поиска"""
+        if self.teacher_vm.has_teacher(teacher_id):
+            return self.teacher_vm.get_teacher_by_id(teacher_id).full_name
+        return "Неизвестно"
+
+    def _on_teachers_changed(self, changes):
+        """Обновление ФИО руководителей у классов и в индексе поиска"""
+        teacher_ids = [teacher_id for teacher_id, fields in changes.updated.items() if "full_name" in fields]
+        teacher_ids += list(changes.removed)
+        for teacher_id in teacher_ids:
+            for classroom_id in self.relations.classroom_ids_of(teacher_id):
+                self._index_search(self._by_id[classroom_id])
+
+    def _check_name_unique(self, class_name: str, classroom_id: int = None):
+        """Проверка на уникальность названия класса за O(1)"""
+        existing_id = self._id_by_name.get(class_name.strip().casefold())
+        if existing_id is not None and existing_id != classroom_id:
+            raise ValueError("Класс с таким названием уже существует.")
+
+    def _validate(self, class_name: str, teacher_id: int, student_count: int, grade_level: int):
+        """Проверка полей класса"""
         if not class_name.strip():
             raise ValueError("Название класса не может быть пустым.")
 
@@ -36,59 +123,163 @@ class ClassroomViewModel:
             raise ValueError("Уровень класса должен быть от 1 до 11.")
 
         # Проверяем существование учителя
-        teacher_exists = any(t.id == teacher_id for t in self.teacher_vm.teachers)
-        if not teacher_exists:
+        if not self.teacher_vm.has_teacher(teacher_id):
             raise ValueError("Указанный учитель не существует.")
 
+    def search(self, term: str, fields: Iterable[str] = None) -> List[Classroom]:
+        """Классы по запросу с учетом транслитерации и опечаток, от более релевантных.
+
+        Пустой запрос - все классы в порядке списка.
+        """
+        if not term.strip():
+            return list(self._classrooms)
+        return [self._by_id[classroom_id] for classroom_id in self.search_engine.search(term, fields)]
+
+    def query(self) -> Query:
+        """Запрос к классам: query().where(grade_level=5).between("student_count", 20).page(0, 50)"""
+        return Query(self._classrooms, self._by_id, self.indexes, self.search_engine,
+                     self.query_cache, self.query_version(), self.substrings)
+
+    def query_version(self):
+        # Классы ищутся и по ФИО руководителя: переименование учителя тоже меняет результаты
+        version = super().query_version()
+        teacher_version = self.teacher_vm.query_version()
+        if version is None or teacher_version is None:
+            return None
+        return (version, teacher_version)
+
+    def add_classroom(self, class_name: str, teacher_id: int, student_count: int, grade_level: int):
+        self._validate(class_name, teacher_id, student_count, grade_level)
+
         # Проверка на уникальность названия класса
-        if any(c.class_name.lower() == class_name.strip().lower() for c in self._classrooms):
-            raise ValueError("Класс с таким названием уже существует.")
+        self._check_name_unique(class_name)
 
         # Генерация нового ID
-        new_id = max((c.id for c in self._classrooms), default=0) + 1
+        new_id = self._ids.next_id()
         new_classroom = Classroom(new_id, class_name.strip(), teacher_id, student_count, grade_level)
         self._classrooms.append(new_classroom)
-        self._save_data()
-        self._notify()
+        self._index_add(new_classroom)
+        self._save_data(upserted=[new_classroom])
+        self._notify(ChangeSet(added={new_classroom.id: new_classroom}))
 
     def update_classroom(self, classroom_id: int, class_name: str, teacher_id: int, student_count: int, grade_level: int):
-        if not class_name.strip():
-            raise ValueError("Название класса не может быть пустым.")
+        self._validate(class_name, teacher_id, student_count, grade_level)
 
-        if student_count < 1 or student_count > 40:
-            raise ValueError("Количество учеников должно быть от 1 до 40.")
+        # Проверка на уникальность названия класса (исключая текущий класс)
+        self._check_name_unique(class_name, classroom_id)
 
-        if grade_level < 1 or grade_level > 11:
-            raise ValueError("Уровень класса должен быть от 1 до 11.")
+        classroom = self._by_id.get(classroom_id)
+        if classroom is None:
+            raise ValueError(f"Класс с ID {classroom_id} не найден.")
 
-        # Проверяем существование учителя
-        teacher_exists = any(t.id == teacher_id for t in self.teacher_vm.teachers)
-        if not teacher_exists:
-            raise ValueError("Указанный учитель не существует.")
+        before = classroom.to_row()
+        self._index_remove(classroom)
+        classroom.class_name = class_name.strip()
+        classroom.teacher_id = teacher_id
+        classroom.student_count = student_count
+        classroom.grade_level = grade_level
+        self._index_add(classroom)
+        self._save_data(upserted=[classroom])
+        self._notify(ChangeSet.diff(classroom, before))
 
-        # Проверка на уникальность названия класса (исключая текущий класс)
-        if any(c.class_name.lower() == class_name.strip().lower() and 
-               c.id != classroom_id for c in self._classrooms):
-            raise ValueError("Класс с таким названием уже существует.")
+    def delete_classroom(self, classroom_id: int):
+        classroom = self._by_id.get(classroom_id)
+        if classroom is not None:
+            self._index_remove(classroom)
+        self._drop_records({classroom_id})
+        self._save_data(deleted=[classroom_id])
+        self._notify(ChangeSet(removed={classroom_id: classroom} if classroom is not None else None))
 
-        for classroom in self._classrooms:
-            if classroom.id == classroom_id:
-                classroom.class_name = class_name.strip()
-                classroom.teacher_id = teacher_id
-                classroom.student_count = student_count
-                classroom.grade_level = grade_level
-                self._save_data()
-                self._notify()
-                return
-        raise ValueError(f"Класс с ID {classroom_id} не найден.")
+    def add_classrooms_bulk(self, rows: List[dict]) -> List[Classroom]:
+        """Добавление пакета классов: проверка всех строк, одна запись и одно уведомление.
 
-    def delete_classroom(self, classroom_id: int):
-        self._classrooms = [c for c in self._classrooms if c.id != classroom_id]
-        self._save_data()
-        self._notify()
+        Строки - словари с полями class_name, teacher_id, student_count, grade_level.
+        При ошибках ни одна строка не добавляется, а BulkValidationError содержит ошибки по строкам.
+        """
+        seen: Dict[str, int] = {}
+
+        def check_row(index: int, row: dict):
+            self._validate(row["class_name"], row["teacher_id"], row["student_count"], row["grade_level"])
+            self._check_name_unique(row["class_name"])
+            name_key = row["class_name"].strip().casefold()
+            if name_key in seen:
+                raise ValueError(f"Название повторяет строку {seen[name_key] + 1}.")
+            seen[name_key] = index
+
+        self._check_rows(rows, check_row)
+
+        new_classrooms = [
+            Classroom(new_id, row["class_name"].strip(), row["teacher_id"], row["student_count"], row["grade_level"])
+            for new_id, row in zip(self._ids.reserve(len(rows)), rows)
+        ]
+        with self.batch():
+            for classroom in new_classrooms:
+                self._classrooms.append(classroom)
+                self._index_add(classroom)
+            self._save_data(upserted=new_classrooms)
+            self._notify(ChangeSet(added={item.id: item for item in new_classrooms}))
+        return new_classrooms
+
+    def update_classrooms_bulk(self, rows: List[dict]) -> List[Classroom]:
+        """Изменение пакета классов по полю id; неуказанные поля сохраняют прежние значения.
+
+        Названия проверяются с учетом переименований внутри пакета.
+        """
+        batch_ids = {row.get("id") for row in rows if isinstance(row, dict) and isinstance(row.get("id"), int)}
+        seen: Dict[str, int] = {}
+        seen_ids: Dict[int, int] = {}
+
+        def check_row(index: int, row: dict):
+            if row["id"] in seen_ids:
+                raise ValueError(f"ID повторяет строку {seen_ids[row['id']] + 1}.")
+            seen_ids[row["id"]] = index
+            classroom = self._by_id.get(row["id"])
+            if classroom is None:
+                raise ValueError(f"Класс с ID {row['id']} не найден.")
+            values = {**classroom.to_dict(), **row}
+            self._validate(values["class_name"], values["teacher_id"], values["student_count"], values["grade_level"])
+            name_key = values["class_name"].strip().casefold()
+            existing_id = self._id_by_name.get(name_key)
+            if existing_id is not None and existing_id != classroom.id and existing_id not in batch_ids:
+                raise ValueError("Класс с таким названием уже существует.")
+            if name_key in seen:
+                raise ValueError(f"Название повторяет строку {seen[name_key] + 1}.")
+            seen[name_key] = index
+            return classroom, values
+
+        changes = self._check_rows(rows, check_row)
+
+        before = {classroom.id: classroom.to_row() for classroom, _ in changes}
+        # Сначала все записи выходят из индексов, чтобы обмен названиями внутри пакета не затирал индекс
+        for classroom, _ in changes:
+            self._index_remove(classroom)
+        with self.batch():
+            for classroom, values in changes:
+                classroom.class_name = values["class_name"].strip()
+                classroom.teacher_id = values["teacher_id"]
+                classroom.student_count = values["student_count"]
+                classroom.grade_level = values["grade_level"]
+                self._index_add(classroom)
+                self._notify(ChangeSet.diff(classroom, before[classroom.id]))
+            updated = [classroom for classroom, _ in changes]
+            self._save_data(upserted=updated)
+        return updated
+
+    def delete_classrooms_bulk(self, classroom_ids: Iterable[int]):
+        """Удаление пакета классов с одной записью и одним уведомлением"""
+        classroom_ids = list(dict.fromkeys(classroom_ids))
+        removed = set(classroom_ids)
+        with self.batch():
+            for classroom_id in classroom_ids:
+                classroom = self._by_id.get(classroom_id)
+                if classroom is not None:
+                    self._index_remove(classroom)
+                    self._notify(ChangeSet(removed={classroom_id: classroom}))
+            self._drop_records(removed)
+            self._save_data(deleted=classroom_ids)
 
     def get_classroom_by_id(self, classroom_id: int) -> Classroom:
-        for classroom in self._classrooms:
-            if classroom.id == classroom_id:
-                return classroom
-        raise ValueError(f"Класс с ID {classroom_id} не найден.")
\ No newline at end of file
+        classroom = self._by_id.get(classroom_id)
+        if classroom is None:
+            raise ValueError(f"Класс с ID {classroom_id} не найден.")
+        return classroom
\ No newline at end of file
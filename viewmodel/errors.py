@@ -0,0 +1,26 @@
+from typing import Dict, List, Tuple
+
+
+class BulkValidationError(ValueError):
+    """Ошибки проверки пакета: список пар (номер строки пакета, сообщение)."""
+
+    def __init__(self, errors: List[Tuple[int, str]]):
+        self.errors = errors
+        super().__init__("\n".join(f"Строка {index + 1}: {message}" for index, message in errors))
+
+
+# Названия типов для сообщений о неверном типе поля
+_TYPE_NAMES = {str: "строкой", int: "целым числом"}
+
+
+def check_row_types(row, types: Dict[str, type]):
+    """Проверка типов указанных в строке пакета полей; ошибка - ValueError с сообщением для строки"""
+    if not isinstance(row, dict):
+        raise ValueError("Строка пакета должна быть словарем полей.")
+    for name, expected in types.items():
+        if name not in row:
+            continue
+        value = row[name]
+        # bool - подкласс int, но числом в данных не считается
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(f"Поле {name} должно быть {_TYPE_NAMES[expected]}.")
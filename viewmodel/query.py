@@ -0,0 +1,325 @@
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Sequence
+from itertools import groupby, islice
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+from service.lru_cache import LRUCache
+
+# Ограничения по полю: равенство значению или диапазон значений (границы включаются)
+EQUAL = "="
+BETWEEN = "between"
+
+
+class FieldIndex:
+    """Индекс поля: значение -> id записей и отсортированный список значений.
+
+    Значения служат корзинами: равенство - одна корзина, диапазон - соседние корзины
+    между границами, сортировка по полю - обход корзин по порядку. Значения упорядочены
+    по _sort_value, как и при сортировке без индекса; значения с равным ключом
+    (строки, отличающиеся регистром) в диапазонах и при обходе идут одной корзиной.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._ids: Dict[Any, Set[int]] = {}
+        self._values: List[Any] = []
+
+    def add(self, record):
+        value = getattr(record, self.field)
+        ids = self._ids.get(value)
+        if ids is None:
+            ids = self._ids[value] = set()
+            insort(self._values, value, key=_sort_value)
+        ids.add(record.id)
+
+    def remove(self, record):
+        """Удаление записи (до изменения ее полей)"""
+        value = getattr(record, self.field)
+        ids = self._ids.get(value)
+        if ids is None:
+            return
+        ids.discard(record.id)
+        if not ids:
+            del self._ids[value]
+            index = bisect_left(self._values, _sort_value(value), key=_sort_value)
+            while self._values[index] != value:
+                index += 1
+            del self._values[index]
+
+    def values(self) -> List[Any]:
+        """Различные значения поля по возрастанию ключа сортировки"""
+        return list(self._values)
+
+    def buckets(self, low=None, high=None, descending: bool = False) -> List[Set[int]]:
+        """Корзины значений от low до high включительно"""
+        start = 0 if low is None else bisect_left(self._values, _sort_value(low), key=_sort_value)
+        stop = len(self._values) if high is None else bisect_right(self._values, _sort_value(high), key=_sort_value)
+        buckets = []
+        for _, values in groupby(self._values[start:stop], key=_sort_value):
+            values = list(values)
+            buckets.append(self._ids[values[0]] if len(values) == 1
+                           else set().union(*(self._ids[value] for value in values)))
+        if descending:
+            buckets.reverse()
+        return buckets
+
+    def lookup(self, kind: str, args: tuple) -> List[Set[int]]:
+        if kind == EQUAL:
+            ids = self._ids.get(args[0])
+            return [ids] if ids else []
+        return self.buckets(*args)
+
+
+class FieldIndexes:
+    """Индексы нескольких полей модели представления"""
+
+    def __init__(self, fields: Iterable[str]):
+        self._indexes = {field: FieldIndex(field) for field in fields}
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._indexes
+
+    def __getitem__(self, field: str) -> FieldIndex:
+        return self._indexes[field]
+
+    def add(self, record):
+        for index in self._indexes.values():
+            index.add(record)
+
+    def remove(self, record):
+        for index in self._indexes.values():
+            index.remove(record)
+
+
+class QueryResult(Sequence):
+    """Результат запроса: упорядоченные id, записи достаются только при обращении"""
+
+    def __init__(self, ids: List[int], by_id: Dict[int, Any]):
+        self.ids = ids
+        self._by_id = by_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._by_id[item_id] for item_id in self.ids[index]]
+        return self._by_id[self.ids[index]]
+
+    def __iter__(self) -> Iterator:
+        return (self._by_id[item_id] for item_id in self.ids)
+
+
+class Page:
+    """Страница результата запроса"""
+
+    __slots__ = ("items", "number", "size", "total")
+
+    def __init__(self, items: list, number: int, size: int, total: int):
+        self.items = items
+        self.number = number
+        self.size = size
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        return (self.total + self.size - 1) // self.size if self.size else 0
+
+    def __repr__(self):
+        return f"Page(number={self.number}, size={self.size}, total={self.total}, items={len(self.items)})"
+
+
+class Query:
+    """Запрос к записям модели представления: фильтры, поиск, сортировка и страницы.
+
+    query().where(subject_code=SUBJECTS.code_of("Физика")).between("experience", 5).search("ив")
+           .order_by("-experience").page(0, 50)
+
+    Ограничения по индексированным полям превращаются в множества id корзин и
+    пересекаются, начиная с самого избирательного; условия по полям без индекса
+    проверяются только у оставшихся кандидатов. Поиск по тексту идет
+    через поисковый движок модели и задает порядок по релевантности, если не указан
+    order_by; точный поиск подстроки (exact=True) отбирает id по триграммному индексу
+    как еще одно условие. Сортировка по индексированному полю обходит корзины по порядку и для
+    страницы останавливается, как только она набрана.
+
+    С кэшем результаты хранятся под ключом (версия данных, нормализованный запрос):
+    после изменения данных версия другая, и старые записи просто вытесняются.
+    Версия None (идет пакет изменений) отключает кэш.
+    """
+
+    def __init__(self, records: List, by_id: Dict[int, Any], indexes: FieldIndexes, search_engine=None,
+                 cache: LRUCache = None, version: Hashable = None, substrings=None):
+        self._records = records
+        self._by_id = by_id
+        self._indexes = indexes
+        self._search_engine = search_engine
+        self._substrings = substrings
+        self._cache = cache if version is not None else None
+        self._version = version
+        self._conditions: List[Tuple[str, str, tuple]] = []
+        self._term = ""
+        self._search_fields: Optional[Tuple[str, ...]] = None
+        self._exact = False
+        self._order: Optional[Tuple[str, bool]] = None
+
+    def where(self, **conditions) -> "Query":
+        """Равенство полей значениям: where(grade_level=5, teacher_id=3)"""
+        for field, value in conditions.items():
+            self._conditions.append((field, EQUAL, (value,)))
+        return self
+
+    def between(self, field: str, low=None, high=None) -> "Query":
+        """Значение поля от low до high включительно; None - без границы"""
+        self._conditions.append((field, BETWEEN, (low, high)))
+        return self
+
+    def search(self, term: str, fields: Iterable[str] = None, exact: bool = False) -> "Query":
+        """Поиск по тексту с учетом транслитерации и опечаток; пустой запрос не ограничивает.
+
+        exact=True - только записи, поля которых содержат term как подстроку без учета регистра.
+        """
+        self._term = term.strip()
+        self._search_fields = tuple(fields) if fields is not None else None
+        self._exact = exact
+        return self
+
+    def order_by(self, field: str, descending: bool = False) -> "Query":
+        """Сортировка по полю; "-поле" - по убыванию"""
+        if field.startswith("-"):
+            field, descending = field[1:], True
+        self._order = (field, descending)
+        return self
+
+    def key(self) -> tuple:
+        """Нормализованное описание запроса: порядок условий и регистр запроса не важны"""
+        conditions = tuple(sorted(set(self._conditions), key=repr))
+        term = self._term.casefold() if self._exact else " ".join(self._term.casefold().split())
+        return (conditions, term, self._search_fields, self._exact, self._order)
+
+    def ids(self) -> List[int]:
+        """id всех подходящих записей в порядке запроса (список из кэша менять нельзя)"""
+        if self._cache is None:
+            return list(self._ordered_ids(self._select()))
+        key = (self._version, self.key())
+        ids = self._cache.get(key)
+        if ids is None:
+            ids = list(self._ordered_ids(self._select()))
+            self._cache.put(key, ids)
+        return ids
+
+    def all(self) -> QueryResult:
+        return QueryResult(self.ids(), self._by_id)
+
+    def count(self) -> int:
+        cached = self._cached_ids()
+        return len(cached) if cached is not None else self._count(self._select())
+
+    def first(self):
+        for item_id in self._ordered_ids(self._select()):
+            return self._by_id[item_id]
+        return None
+
+    def page(self, number: int, size: int) -> Page:
+        """Страница number (с нуля) по size записей"""
+        start = number * size
+        cached = self._cached_ids()
+        if cached is not None:
+            return Page([self._by_id[item_id] for item_id in cached[start:start + size]], number, size, len(cached))
+        selected = self._select()
+        ids = list(islice(self._ordered_ids(selected), start, start + size))
+        return Page([self._by_id[item_id] for item_id in ids], number, size, self._count(selected))
+
+    def _cached_ids(self) -> Optional[List[int]]:
+        """Результат этого запроса из кэша, если он там есть (без подсчета промаха)"""
+        if self._cache is None:
+            return None
+        key = (self._version, self.key())
+        return self._cache.get(key) if key in self._cache else None
+
+    def _count(self, selected) -> int:
+        return len(self._records) if selected is None else len(selected)
+
+    def _matches(self, record, conditions) -> bool:
+        for field, kind, args in conditions:
+            value = getattr(record, field)
+            if kind == EQUAL:
+                if value != args[0]:
+                    return False
+            elif ((args[0] is not None and _sort_value(value) < _sort_value(args[0]))
+                  or (args[1] is not None and _sort_value(value) > _sort_value(args[1]))):
+                return False
+        return True
+
+    def _plan(self) -> Tuple[List[Set[int]], list]:
+        """Множества id по индексированным условиям от самого избирательного и условия без индекса"""
+        indexed = []
+        rest = []
+        for field, kind, args in self._conditions:
+            if field not in self._indexes:
+                rest.append((field, kind, args))
+                continue
+            buckets = self._indexes[field].lookup(kind, args)
+            indexed.append(buckets[0] if len(buckets) == 1 else set().union(*buckets))
+        if self._term and self._exact:
+            indexed.append(self._substrings.search(self._term, self._search_fields))
+        indexed.sort(key=len)
+        return indexed, rest
+
+    def _select(self):
+        """Подходящие id: список по релевантности при поиске, иначе множество; None - все записи"""
+        if self._term and not self._exact:
+            return self._ranked_ids()
+        if not self._conditions and not self._term:
+            return None
+        indexed, rest = self._plan()
+        if not indexed:
+            return {record.id for record in self._records if self._matches(record, rest)}
+        # Пересечение начинается с самого маленького множества
+        candidates = indexed[0].intersection(*indexed[1:])
+        if not rest:
+            return candidates
+        return {item_id for item_id in candidates if self._matches(self._by_id[item_id], rest)}
+
+    def _ranked_ids(self) -> List[int]:
+        """id по релевантности поиска, отфильтрованные условиями"""
+        ranked = self._search_engine.search(self._term, self._search_fields)
+        if not self._conditions:
+            return ranked
+        indexed, rest = self._plan()
+        for allowed in indexed:
+            ranked = [item_id for item_id in ranked if item_id in allowed]
+        return [item_id for item_id in ranked if self._matches(self._by_id[item_id], rest)]
+
+    def _ordered_ids(self, selected) -> Iterator[int]:
+        if self._order is not None:
+            return self._sorted(selected)
+        if selected is None:
+            # Без условий - порядок списка записей
+            return (record.id for record in self._records)
+        return iter(selected) if isinstance(selected, list) else iter(sorted(selected))
+
+    def _sorted(self, selected) -> Iterator[int]:
+        """Сортировка по полю order_by, при равенстве - по id.
+
+        По индексированному полю корзины обходятся по порядку, если подходящих записей
+        не меньше восьмой части: тогда это дешевле сортировки и ленится до конца страницы.
+        """
+        field, descending = self._order
+        if field in self._indexes and (selected is None or len(selected) * 8 >= len(self._by_id)):
+            return self._walk_buckets(field, descending, selected)
+        ids = (record.id for record in self._records) if selected is None else selected
+        records = [self._by_id[item_id] for item_id in ids]
+        records.sort(key=lambda record: (_sort_value(getattr(record, field)), record.id), reverse=descending)
+        return (record.id for record in records)
+
+    def _walk_buckets(self, field: str, descending: bool, selected) -> Iterator[int]:
+        allowed = selected if selected is None or isinstance(selected, set) else set(selected)
+        for bucket in self._indexes[field].buckets(descending=descending):
+            if allowed is not None:
+                bucket = [item_id for item_id in bucket if item_id in allowed]
+            yield from sorted(bucket, reverse=descending)
+
+
+def _sort_value(value):
+    # Ключ сортировки и диапазонов: строки сравниваются без учета регистра
+    return value.casefold() if isinstance(value, str) else value
@@ -0,0 +1,102 @@
+from typing import Dict, Set, List, FrozenSet, Iterable
+
+
+class RelationshipRegistry:
+    """Связи учитель -> классы: обратный индекс и правила удаления учителя."""
+
+    # Правила удаления учителя, у которого есть классы
+    RESTRICT = "restrict"
+    CASCADE = "cascade"
+
+    def __init__(self, on_teacher_delete: str = RESTRICT):
+        if on_teacher_delete not in (self.RESTRICT, self.CASCADE):
+            raise ValueError(f"Неизвестное правило удаления: {on_teacher_delete}")
+        self.on_teacher_delete = on_teacher_delete
+        self._classrooms_by_teacher: Dict[int, Set[int]] = {}
+        # Код предмета каждого учителя и число классов по кодам предметов
+        self._subject_of: Dict[int, int] = {}
+        self._load_by_subject: Dict[int, int] = {}
+        self._classroom_vm = None
+
+    def attach_classrooms(self, classroom_vm):
+        """Подключение модели классов, которая поддерживает индекс и выполняет каскад"""
+        self._classroom_vm = classroom_vm
+
+    def link(self, teacher_id: int, classroom_id: int):
+        classroom_ids = self._classrooms_by_teacher.setdefault(teacher_id, set())
+        if classroom_id not in classroom_ids:
+            classroom_ids.add(classroom_id)
+            self._change_load(self._subject_of.get(teacher_id), 1)
+
+    def unlink(self, teacher_id: int, classroom_id: int):
+        classroom_ids = self._classrooms_by_teacher.get(teacher_id)
+        if classroom_ids is not None and classroom_id in classroom_ids:
+            classroom_ids.remove(classroom_id)
+            if not classroom_ids:
+                del self._classrooms_by_teacher[teacher_id]
+            self._change_load(self._subject_of.get(teacher_id), -1)
+
+    def set_subject(self, teacher_id: int, subject_code: int):
+        """Учет предмета учителя: его классы переходят к нагрузке нового кода"""
+        self.clear_subject(teacher_id)
+        self._subject_of[teacher_id] = subject_code
+        self._change_load(subject_code, self.class_count(teacher_id))
+
+    def clear_subject(self, teacher_id: int):
+        """Снятие учителя с учета нагрузки по предметам"""
+        subject_code = self._subject_of.pop(teacher_id, None)
+        self._change_load(subject_code, -self.class_count(teacher_id))
+
+    def _change_load(self, subject_code, delta: int):
+        if subject_code is None or not delta:
+            return
+        count = self._load_by_subject.get(subject_code, 0) + delta
+        if count:
+            self._load_by_subject[subject_code] = count
+        else:
+            del self._load_by_subject[subject_code]
+
+    def subject_load(self) -> Dict[int, int]:
+        """Количество классов по коду предмета классного руководителя"""
+        return dict(self._load_by_subject)
+
+    def classroom_ids_of(self, teacher_id: int) -> FrozenSet[int]:
+        """ID классов, которыми руководит учитель"""
+        return frozenset(self._classrooms_by_teacher.get(teacher_id, ()))
+
+    def teacher_ids(self) -> FrozenSet[int]:
+        """ID учителей, у которых есть классы"""
+        return frozenset(self._classrooms_by_teacher)
+
+    def class_count(self, teacher_id: int) -> int:
+        return len(self._classrooms_by_teacher.get(teacher_id, ()))
+
+    def classrooms_of(self, teacher_id: int) -> List:
+        """Классы, которыми руководит учитель"""
+        if self._classroom_vm is None:
+            return []
+        return [self._classroom_vm.get_classroom_by_id(classroom_id)
+                for classroom_id in sorted(self._classrooms_by_teacher.get(teacher_id, ()))]
+
+    def can_delete_teacher(self, teacher_id: int) -> bool:
+        return self.on_teacher_delete == self.CASCADE or self.class_count(teacher_id) == 0
+
+    def check_teacher_delete(self, teacher_id: int):
+        """Проверка правила удаления без изменений: при запрете - ValueError"""
+        if self.on_teacher_delete == self.RESTRICT and self.class_count(teacher_id):
+            classroom_names = ", ".join(c.class_name for c in self.classrooms_of(teacher_id))
+            raise ValueError(f"Нельзя удалить учителя, который является классным руководителем классов: {classroom_names}")
+
+    def before_teacher_delete(self, teacher_id: int):
+        """Применение правила удаления: запрет или каскадное удаление классов"""
+        self.before_teachers_delete([teacher_id])
+
+    def before_teachers_delete(self, teacher_ids: Iterable[int]):
+        """Применение правила удаления к нескольким учителям; каскад удаляет классы одним пакетом"""
+        teacher_ids = list(teacher_ids)
+        for teacher_id in teacher_ids:
+            self.check_teacher_delete(teacher_id)
+        classroom_ids = sorted(classroom_id for teacher_id in teacher_ids
+                               for classroom_id in self._classrooms_by_teacher.get(teacher_id, ()))
+        if classroom_ids:
+            self._classroom_vm.delete_classrooms_bulk(classroom_ids)
@@ -0,0 +1,48 @@
+from typing import Dict
+
+# Верхние границы интервалов стажа (включительно) и их подписи
+EXPERIENCE_RANGES = ((5, "0-5 лет"), (10, "6-10 лет"), (20, "11-20 лет"), (None, "20+ лет"))
+
+
+def experience_range(experience: int) -> str:
+    """Интервал стажа для отчета"""
+    for high, label in EXPERIENCE_RANGES:
+        if high is None or experience <= high:
+            return label
+
+
+class ReportViews:
+    """Наборы данных отчетов поверх сводных показателей моделей представления.
+
+    Распределения читаются из Aggregates, которые модели поддерживают при каждом
+    изменении записей, поэтому отчет не проходит по данным. Нагрузку по предметам
+    ведет реестр связей: он переносит число классов учителя между кодами предметов
+    при смене предмета и меняет ее на единицу при назначении или снятии класса.
+    """
+
+    def __init__(self, teacher_vm, classroom_vm):
+        self.teacher_vm = teacher_vm
+        self.classroom_vm = classroom_vm
+
+    def experience_ranges(self) -> Dict[str, int]:
+        """Количество учителей по интервалам стажа в порядке EXPERIENCE_RANGES"""
+        ranges = {label: 0 for _, label in EXPERIENCE_RANGES}
+        for experience, count in self.teacher_vm.aggregates.histogram("experience").items():
+            ranges[experience_range(experience)] += count
+        return ranges
+
+    def grade_distribution(self) -> Dict[int, int]:
+        """Количество классов по уровням"""
+        return self.classroom_vm.aggregates.counts("grade_level")
+
+    def students_by_grade(self) -> Dict[int, int]:
+        """Количество учеников по уровням"""
+        return self.classroom_vm.aggregates.sums_by("grade_level", "student_count")
+
+    def student_counts(self) -> Dict[int, int]:
+        """Количество классов по числу учеников"""
+        return self.classroom_vm.aggregates.histogram("student_count")
+
+    def subject_load(self) -> Dict[int, int]:
+        """Количество классов по коду предмета классного руководителя"""
+        return self.classroom_vm.relations.subject_load()
@@ -1,30 +1,90 @@
-from typing import List, Callable
+from typing import List, Dict, Iterable, Optional
 from model.teacher import Teacher
 from service.json_service import JSONService
+from service.id_sequence import IdSequence
+from service.search_engine import SearchEngine
+from service.trigram_index import TrigramIndex
+from viewmodel.base_viewmodel import BaseViewModel
+from viewmodel.change_set import ChangeSet
+from viewmodel.errors import BulkValidationError
+from viewmodel.aggregates import Aggregates
+from viewmodel.query import FieldIndexes, Query
+from viewmodel.relationship_registry import RelationshipRegistry
 
-class TeacherViewModel:
-    def __init__(self, json_service: JSONService):
-        self.json_service = json_service
+class TeacherViewModel(BaseViewModel):
+    FILENAME = "teachers.json"
+    # Типы полей строк пакетных операций
+    ROW_TYPES = {"id": int, "full_name": str, "subject": str, "experience": int, "category": str, "phone": str}
+
+    def __init__(self, json_service: JSONService, relations: RelationshipRegistry = None):
+        super().__init__(json_service)
+        # Связи с классами: проверка удаления без обращения к модели классов
+        self.relations = relations or RelationshipRegistry()
         # Загрузка данных из JSON при инициализации
-        self._teachers: List[Teacher] = self.json_service.load_data("teachers.json", Teacher)
-        self._on_data_changed: Callable[[], None] = None
+        self._teachers: List[Teacher] = self.json_service.load_data(self.FILENAME, Teacher)
+        # Индексы: id -> учитель и ФИО без учета регистра -> id
+        self._by_id: Dict[int, Teacher] = {}
+        self._id_by_name: Dict[str, int] = {}
+        # Ранжированный поиск с транслитерацией и опечатками для строки поиска
+        self.search_engine = SearchEngine(("full_name", "subject", "phone"))
+        # Точный поиск подстроки без учета регистра: query().search(term, exact=True)
+        self.substrings = TrigramIndex(("full_name", "subject", "phone"))
+        # Индексы полей для запросов: равенство, диапазоны и сортировка; предмет и категория - по кодам
+        self.indexes = FieldIndexes(("subject_code", "category_code", "experience"))
+        # Сводные показатели для статистики: по предметам, категориям и стажу
+        self.aggregates = Aggregates(group_by=("subject_code", "category_code"), values=("experience",))
+        for teacher in self._teachers:
+            self._index_add(teacher)
+        # Последовательность ID: без сканирования списка и без повторного использования
+        self._ids = IdSequence(json_service, "teachers", floor=max(self._by_id, default=0))
 
     @property
     def teachers(self) -> List[Teacher]:
         return self._teachers
 
-    def set_on_data_changed(self, callback: Callable[[], None]):
-        self._on_data_changed = callback
+    def _records(self) -> List[Teacher]:
+        return self._teachers
+
+    def _set_records(self, records: List[Teacher]):
+        self._teachers = records
 
-    def _notify(self):
-        if self._on_data_changed:
-            self._on_data_changed()
+    def _has_record(self, item_id: int) -> bool:
+        return item_id in self._by_id
 
-    def _save_data(self):
-        """Сохранение данных в JSON файл"""
-        self.json_service.save_data("teachers.json", self._teachers)
+    def _index_add(self, teacher: Teacher):
+        """Добавление учителя в индексы"""
+        if self._undo_logs:
+            self._remember(teacher, teacher.id not in self._by_id)
+        self._by_id[teacher.id] = teacher
+        self._id_by_name[teacher.name_key] = teacher.id
+        self.search_engine.add(teacher.id, teacher.search_keys)
+        self.substrings.add(teacher.id, teacher.search_keys)
+        self.relations.set_subject(teacher.id, teacher.subject_code)
+        self.indexes.add(teacher)
+        self.aggregates.add(teacher)
 
-    def add_teacher(self, full_name: str, subject: str, experience: int, category: str, phone: str = ""):
+    def _index_remove(self, teacher: Teacher):
+        """Удаление учителя из индексов (до изменения его полей)"""
+        if self._undo_logs:
+            self._remember(teacher)
+        self._by_id.pop(teacher.id, None)
+        name_key = teacher.name_key
+        if self._id_by_name.get(name_key) == teacher.id:
+            del self._id_by_name[name_key]
+        self.search_engine.remove(teacher.id)
+        self.substrings.remove(teacher.id)
+        self.relations.clear_subject(teacher.id)
+        self.indexes.remove(teacher)
+        self.aggregates.remove(teacher)
+
+    def _check_name_unique(self, full_name: str, teacher_id: int = None):
+        """Проверка на уникальность ФИО за O(1)"""
+        existing_id = self._id_by_name.get(full_name.strip().casefold())
+        if existing_id is not None and existing_id != teacher_id:
+            raise ValueError("Учитель с таким ФИО уже существует.")
+
+    def _validate(self, full_name: str, subject: str, experience: int, category: str):
+        """Проверка полей учителя"""
         if not full_name.strip():
             raise ValueError("ФИО не может быть пустым.")
 
@@ -37,61 +97,180 @@ class TeacherViewModel:
         if not category.strip():
             raise ValueError("Категория не может быть пустой.")
 
+    def search(self, term: str, fields: Iterable[str] = None) -> List[Teacher]:
+        """Учителя по запросу с учетом транслитерации и опечаток, от более релевантных.
+
+        Пустой запрос - все учителя в порядке списка.
+        """
+        if not term.strip():
+            return list(self._teachers)
+        return [self._by_id[teacher_id] for teacher_id in self.search_engine.search(term, fields)]
+
+    def query(self) -> Query:
+        """Запрос к учителям: query().between("experience", 5).order_by("full_name").page(0, 50)"""
+        return Query(self._teachers, self._by_id, self.indexes, self.search_engine,
+                     self.query_cache, self.query_version(), self.substrings)
+
+    def has_teacher(self, teacher_id: int) -> bool:
+        return teacher_id in self._by_id
+
+    def find_teacher_by_name(self, full_name: str) -> Optional[Teacher]:
+        """Учитель по ФИО без учета регистра"""
+        teacher_id = self._id_by_name.get(full_name.strip().casefold())
+        return self._by_id.get(teacher_id)
+
+    def add_teacher(self, full_name: str, subject: str, experience: int, category: str, phone: str = ""):
+        self._validate(full_name, subject, experience, category)
+
         # Проверка на уникальность ФИО
-        if any(t.full_name.lower() == full_name.strip().lower() for t in self._teachers):
-            raise ValueError("Учитель с таким ФИО уже существует.")
+        self._check_name_unique(full_name)
 
         # Генерация нового ID
-        new_id = max((t.id for t in self._teachers), default=0) + 1
+        new_id = self._ids.next_id()
         new_teacher = Teacher(new_id, full_name.strip(), subject.strip(), experience, category.strip(), phone.strip())
         self._teachers.append(new_teacher)
-        self._save_data()
-        self._notify()
+        self._index_add(new_teacher)
+        self._save_data(upserted=[new_teacher])
+        self._notify(ChangeSet(added={new_teacher.id: new_teacher}))
 
     def update_teacher(self, teacher_id: int, full_name: str, subject: str, experience: int, category: str, phone: str):
-        if not full_name.strip():
-            raise ValueError("ФИО не может быть пустым.")
+        self._validate(full_name, subject, experience, category)
 
-        if not subject.strip():
-            raise ValueError("Предмет не может быть пустым.")
+        # Проверка на уникальность ФИО (исключая текущего учителя)
+        self._check_name_unique(full_name, teacher_id)
 
-        if experience < 0 or experience > 50:
-            raise ValueError("Стаж должен быть от 0 до 50 лет.")
+        teacher = self._by_id.get(teacher_id)
+        if teacher is None:
+            raise ValueError(f"Учитель с ID {teacher_id} не найден.")
 
-        if not category.strip():
-            raise ValueError("Категория не может быть пустой.")
+        before = teacher.to_row()
+        self._index_remove(teacher)
+        teacher.full_name = full_name.strip()
+        teacher.subject = subject.strip()
+        teacher.experience = experience
+        teacher.category = category.strip()
+        teacher.phone = phone.strip()
+        self._index_add(teacher)
+        self._save_data(upserted=[teacher])
+        self._notify(ChangeSet.diff(teacher, before))
 
-        # Проверка на уникальность ФИО (исключая текущего учителя)
-        if any(t.full_name.lower() == full_name.strip().lower() and 
-               t.id != teacher_id for t in self._teachers):
-            raise ValueError("Учитель с таким ФИО уже существует.")
+    def delete_teacher(self, teacher_id: int):
+        # Проверяем, является ли учитель классным руководителем (запрет или каскад)
+        self.relations.before_teacher_delete(teacher_id)
 
-        for teacher in self._teachers:
-            if teacher.id == teacher_id:
-                teacher.full_name = full_name.strip()
-                teacher.subject = subject.strip()
-                teacher.experience = experience
-                teacher.category = category.strip()
-                teacher.phone = phone.strip()
-                self._save_data()
-                self._notify()
-                return
-        raise ValueError(f"Учитель с ID {teacher_id} не найден.")
+        teacher = self._by_id.get(teacher_id)
+        if teacher is not None:
+            self._index_remove(teacher)
+        self._drop_records({teacher_id})
+        self._save_data(deleted=[teacher_id])
+        self._notify(ChangeSet(removed={teacher_id: teacher} if teacher is not None else None))
 
-    def delete_teacher(self, teacher_id: int):
-        # Проверяем, является ли учитель классным руководителем
-        from custom_main_school import classroom_vm
-        teacher_classrooms = [c for c in classroom_vm.classrooms if c.teacher_id == teacher_id]
-        if teacher_classrooms:
-            classroom_names = ", ".join([c.class_name for c in teacher_classrooms])
-            raise ValueError(f"Нельзя удалить учителя, который является классным руководителем классов: {classroom_names}")
+    def add_teachers_bulk(self, rows: List[dict]) -> List[Teacher]:
+        """Добавление пакета учителей: проверка всех строк, одна запись и одно уведомление.
+
+        Строки - словари с полями full_name, subject, experience, category и необязательным phone.
+        При ошибках ни одна строка не добавляется, а BulkValidationError содержит ошибки по строкам.
+        """
+        seen: Dict[str, int] = {}
+
+        def check_row(index: int, row: dict):
+            self._validate(row["full_name"], row["subject"], row["experience"], row["category"])
+            self._check_name_unique(row["full_name"])
+            name_key = row["full_name"].strip().casefold()
+            if name_key in seen:
+                raise ValueError(f"ФИО повторяет строку {seen[name_key] + 1}.")
+            seen[name_key] = index
 
-        self._teachers = [t for t in self._teachers if t.id != teacher_id]
-        self._save_data()
-        self._notify()
+        self._check_rows(rows, check_row)
+
+        new_teachers = [
+            Teacher(new_id, row["full_name"].strip(), row["subject"].strip(), row["experience"],
+                    row["category"].strip(), row.get("phone", "").strip())
+            for new_id, row in zip(self._ids.reserve(len(rows)), rows)
+        ]
+        with self.batch():
+            for teacher in new_teachers:
+                self._teachers.append(teacher)
+                self._index_add(teacher)
+            self._save_data(upserted=new_teachers)
+            self._notify(ChangeSet(added={item.id: item for item in new_teachers}))
+        return new_teachers
+
+    def update_teachers_bulk(self, rows: List[dict]) -> List[Teacher]:
+        """Изменение пакета учителей по полю id; неуказанные поля сохраняют прежние значения.
+
+        ФИО проверяются с учетом переименований внутри пакета: можно занять ФИО,
+        которое освобождает другая строка пакета.
+        """
+        batch_ids = {row.get("id") for row in rows if isinstance(row, dict) and isinstance(row.get("id"), int)}
+        seen: Dict[str, int] = {}
+        seen_ids: Dict[int, int] = {}
+
+        def check_row(index: int, row: dict):
+            if row["id"] in seen_ids:
+                raise ValueError(f"ID повторяет строку {seen_ids[row['id']] + 1}.")
+            seen_ids[row["id"]] = index
+            teacher = self._by_id.get(row["id"])
+            if teacher is None:
+                raise ValueError(f"Учитель с ID {row['id']} не найден.")
+            values = {**teacher.to_dict(), **row}
+            self._validate(values["full_name"], values["subject"], values["experience"], values["category"])
+            name_key = values["full_name"].strip().casefold()
+            existing_id = self._id_by_name.get(name_key)
+            if existing_id is not None and existing_id != teacher.id and existing_id not in batch_ids:
+                raise ValueError("Учитель с таким ФИО уже существует.")
+            if name_key in seen:
+                raise ValueError(f"ФИО повторяет строку {seen[name_key] + 1}.")
+            seen[name_key] = index
+            return teacher, values
+
+        changes = self._check_rows(rows, check_row)
+
+        before = {teacher.id: teacher.to_row() for teacher, _ in changes}
+        # Сначала все записи выходят из индексов, чтобы обмен ФИО внутри пакета не затирал индекс
+        for teacher, _ in changes:
+            self._index_remove(teacher)
+        with self.batch():
+            for teacher, values in changes:
+                teacher.full_name = values["full_name"].strip()
+                teacher.subject = values["subject"].strip()
+                teacher.experience = values["experience"]
+                teacher.category = values["category"].strip()
+                teacher.phone = values["phone"].strip()
+                self._index_add(teacher)
+                self._notify(ChangeSet.diff(teacher, before[teacher.id]))
+            updated = [teacher for teacher, _ in changes]
+            self._save_data(upserted=updated)
+        return updated
+
+    def delete_teachers_bulk(self, teacher_ids: Iterable[int]):
+        """Удаление пакета учителей с одной записью и одним уведомлением.
+
+        Правило удаления проверяется для всех строк заранее; при запрете ничего не удаляется.
+        """
+        teacher_ids = list(dict.fromkeys(teacher_ids))
+        errors = []
+        for index, teacher_id in enumerate(teacher_ids):
+            try:
+                self.relations.check_teacher_delete(teacher_id)
+            except ValueError as e:
+                errors.append((index, str(e)))
+        if errors:
+            raise BulkValidationError(errors)
+
+        self.relations.before_teachers_delete(teacher_ids)
+        removed = set(teacher_ids)
+        with self.batch():
+            for teacher_id in teacher_ids:
+                teacher = self._by_id.get(teacher_id)
+                if teacher is not None:
+                    self._index_remove(teacher)
+                    self._notify(ChangeSet(removed={teacher_id: teacher}))
+            self._drop_records(removed)
+            self._save_data(deleted=teacher_ids)
 
     def get_teacher_by_id(self, teacher_id: int) -> Teacher:
-        for teacher in self._teachers:
-            if teacher.id == teacher_id:
-                return teacher
-        raise ValueError(f"Учитель с ID {teacher_id} не найден.")
\ No newline at end of file
+        teacher = self._by_id.get(teacher_id)
+        if teacher is None:
+            raise ValueError(f"Учитель с ID {teacher_id} не найден.")
+        return teacher
\ No newline at end of file
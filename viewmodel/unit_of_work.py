@@ -0,0 +1,71 @@
+class UnitOfWork:
+    """Транзакция над моделями учителей и классов.
+
+    Изменения внутри блока with применяются в памяти, запись в файлы и уведомления
+    откладываются до выхода. Перед записью проверяется целостность связей; при любом
+    исключении обе модели возвращаются к состоянию на входе и ничего не записывается.
+    Для отката запоминаются только затронутые записи, поэтому он не зависит от размера данных.
+
+    Два файла нельзя записать атомарно, поэтому запись идет в порядке, при котором сбой
+    между шагами не оставляет класс со ссылкой на отсутствующего учителя: сначала новые и
+    измененные учителя, затем классы, и только потом удаления учителей. После сбоя
+    транзакция может оказаться записанной частично, но связи в файлах остаются целыми.
+    """
+
+    def __init__(self, teacher_vm, classroom_vm):
+        self.teacher_vm = teacher_vm
+        self.classroom_vm = classroom_vm
+        self._view_models = (teacher_vm, classroom_vm)
+        self._undo_logs = None
+
+    def __enter__(self):
+        self._undo_logs = [vm._begin_undo() for vm in self._view_models]
+        for vm in self._view_models:
+            vm._batch_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for vm in self._view_models:
+            vm._batch_depth -= 1
+        if exc_type is None:
+            try:
+                self._check_integrity()
+            except ValueError:
+                self._rollback()
+                raise
+            for vm, log in zip(self._view_models, self._undo_logs):
+                vm._end_undo(log)
+            self._commit()
+        else:
+            self._rollback()
+        return False
+
+    def _check_integrity(self):
+        """Каждый класс ссылается на существующего учителя"""
+        missing = sorted(teacher_id for teacher_id in self.classroom_vm.relations.teacher_ids()
+                         if not self.teacher_vm.has_teacher(teacher_id))
+        if missing:
+            raise ValueError(f"Классы ссылаются на несуществующих учителей: {', '.join(map(str, missing))}")
+
+    def _commit(self):
+        """Запись в порядке учителя -> классы -> удаления учителей, затем уведомления.
+
+        Внутри внешнего пакета запись и уведомления делает он.
+        """
+        finished = [vm for vm in self._view_models if not vm._batch_depth]
+        if len(finished) == len(self._view_models):
+            # flush между шагами: отложенная запись сервиса иначе может поменять их порядок
+            self.teacher_vm._write_upserts()
+            self.teacher_vm.json_service.flush()
+            self.classroom_vm._write_batch()
+            self.classroom_vm.json_service.flush()
+            self.teacher_vm._write_batch()
+        else:
+            for vm in finished:
+                vm._write_batch()
+        for vm in finished:
+            vm._notify_batch()
+
+    def _rollback(self):
+        for vm, log in zip(self._view_models, self._undo_logs):
+            vm._undo(log)